@@ -1,23 +1,69 @@
 import streamlit as st
 import pandas as pd
 
+from utils.duplicates import default_keys, find_duplicates
+from utils.export import FORMATS, export, prepared_export
+from utils.pipeline import Step, fill_statistic, recipe_to_json, session_pipeline
+from utils.streaming import column_info, describe_stats
+from utils.uploads import SOURCE_COLUMN, can_stream, read_uploads, should_stream, stream_uploads, typing_report, uploads_key
+
 st.set_page_config(page_title="Xử lý dữ liệu", layout="wide")
 
 st.title("Xử lý dữ liệu (Data Wrangling)")
 st.markdown("Chao mừng bạn đến với trang xử lý dữ liệu!")
 st.markdown("Trang này giúp bạn xử lý dữ liệu một cách dễ dàng và nhanh chóng.")
 
+
+def apply_step(step, message, error_prefix="❌ Lỗi"):
+    """Ghi bước vào pipeline; thành công thì chạy lại trang để mọi phần dùng kết quả mới."""
+    try:
+        pipeline.append(step)
+    except Exception as e:
+        st.error(f"{error_prefix}: {e}")
+    else:
+        st.session_state["wrangling_message"] = message
+        st.rerun()
+
+
 # Tải dữ liệu
 st.subheader("📥 Tải dữ liệu")
-uploaded_file = st.file_uploader("Tải tệp dữ liệu (.csv hoặc .xlsx)", type=["csv", "xlsx"])
+uploaded_files = st.file_uploader("Tải tệp dữ liệu (.csv hoặc .xlsx), có thể chọn nhiều tệp cùng lúc", type=["csv", "xlsx"], accept_multiple_files=True)
 
-if uploaded_file:
-    if uploaded_file.name.endswith(".csv"):
-        df = pd.read_csv(uploaded_file)
-    else:
-        df = pd.read_excel(uploaded_file)
+if uploaded_files:
+    # Tệp CSV lớn: đọc theo khối để tính thống kê, không nạp toàn bộ vào một bảng
+    if st.toggle("🌊 Chế độ streaming (chỉ xem thống kê, dành cho tệp CSV lớn)", value=should_stream(uploaded_files), disabled=not can_stream(uploaded_files)):
+        stats = stream_uploads(uploaded_files)
+        st.info("🌊 Đang ở chế độ streaming: dữ liệu được đọc theo khối nên chỉ hiển thị thống kê tổng quan; số giá trị duy nhất và các tứ phân vị là ước lượng. Tắt chế độ này để xử lý dữ liệu.")
+        st.subheader("🔍 Tổng quan tập dữ liệu")
+        rows = max((s.rows for s in stats.values()), default=0)
+        st.markdown(f"**Kích thước dữ liệu:** {rows} dòng, {len(stats)} cột")
+        st.markdown("**Thông tin cột:**")
+        st.dataframe(column_info(stats))
+        st.markdown("**Thống kê mô tả (các cột số):**")
+        st.dataframe(describe_stats({col: s for col, s in stats.items() if s.numeric}))
+        st.stop()
+
+    # Chỉ phân tích tệp một lần cho mỗi nội dung, các lần rerun lấy lại từ bộ nhớ
+    # Nhiều tệp được căn cột và ghép một lần, cache theo hash nội dung của các tệp
+    # Các bước xử lý được ghi lại trong session, df là kết quả của bước cuối (đã cache)
+    pipeline = session_pipeline(uploads_key(uploaded_files), lambda: read_uploads(uploaded_files))
+    df = pipeline.result()
 
-    st.success("✅ Đã tải dữ liệu thành công!")
+    if len(uploaded_files) > 1:
+        st.success(f"✅ Đã ghép {len(uploaded_files)} tệp thành công! Cột '{SOURCE_COLUMN}' cho biết tệp gốc của từng dòng.")
+    else:
+        st.success("✅ Đã tải dữ liệu thành công!")
+    report = typing_report(uploaded_files)
+    if report is not None and not report.empty:
+        saved = report["Trước (KB)"].sum() - report["Sau (KB)"].sum()
+        with st.expander(f"🧮 Đã tự động tối ưu kiểu dữ liệu cho {len(report)} cột, tiết kiệm {saved:,.1f} KB bộ nhớ"):
+            st.dataframe(report, hide_index=True)
+    message = st.session_state.pop("wrangling_message", None)
+    if message:
+        st.success(message)
+    if pipeline.error is not None:
+        index, error = pipeline.error
+        st.error(f"❌ Bước {index + 1} ({pipeline.steps[index].describe()}) không chạy lại được: {error}")
     st.dataframe(df.head())
 
     # Bước 2: Tổng quan dữ liệu
@@ -27,7 +73,7 @@ if uploaded_file:
     st.markdown("**Thông tin cột:**")
     col_info = pd.DataFrame({
         "Tên cột": df.columns,
-        "Kiểu dữ liệu": df.dtypes.values,
+        "Kiểu dữ liệu": df.dtypes.astype(str).values,
         "Số giá trị không null": df.notnull().sum().values,
         "Số giá trị duy nhất": df.nunique().values
     })
@@ -47,59 +93,114 @@ if uploaded_file:
 
         option = st.radio("Chọn phương pháp xử lý", ["Không xử lý", "Xoá dòng thiếu", "Điền giá trị cụ thể", "Điền theo trung bình / mode / 0"])
         if option == "Xoá dòng thiếu":
-            df = df.dropna()
-            st.success("✅ Đã xoá các dòng có giá trị thiếu.")
+            if st.button("Xoá các dòng thiếu"):
+                apply_step(Step.make("dropna"), "✅ Đã xoá các dòng có giá trị thiếu.")
         elif option == "Điền giá trị cụ thể":
             selected_col = st.selectbox("Chọn cột", df.columns[df.isnull().any()])
             fill_value = st.text_input("Nhập giá trị thay thế")
             if st.button("Áp dụng"):
-                df[selected_col] = df[selected_col].fillna(fill_value)
-                st.success(f"✅ Đã điền NaN trong cột '{selected_col}' bằng '{fill_value}'")
+                apply_step(
+                    Step.make("fillna", column=selected_col, value=fill_value),
+                    f"✅ Đã điền NaN trong cột '{selected_col}' bằng '{fill_value}'",
+                )
         elif option == "Điền theo trung bình / mode / 0":
             selected_col = st.selectbox("Chọn cột", df.columns[df.isnull().any()])
             method = st.selectbox("Phương pháp", ["Trung bình", "Mode", "0"])
             if st.button("Áp dụng phương pháp"):
                 try:
                     if method == "Trung bình":
-                        value = df[selected_col].mean()
+                        value = fill_statistic(df[selected_col], "mean")
                     elif method == "Mode":
-                        value = df[selected_col].mode()[0]
+                        value = fill_statistic(df[selected_col], "mode")
                     else:
                         value = 0
-                    df[selected_col] = df[selected_col].fillna(value)
-                    st.success(f"✅ Đã điền NaN trong cột '{selected_col}' bằng giá trị {method.lower()}: {value}")
                 except Exception as e:
                     st.error(f"Lỗi: {e}")
+                else:
+                    apply_step(
+                        Step.make("fillna", column=selected_col, value=value),
+                        f"✅ Đã điền NaN trong cột '{selected_col}' bằng giá trị {method.lower()}: {value}",
+                        "Lỗi",
+                    )
 
     # Bước 4: Xử lý dữ liệu trùng lặp
     st.subheader("📛 Xử lý dòng trùng lặp")
-    num_duplicates = df.duplicated().sum()
+    # Bảng GSO: mặc định xét trùng theo (Địa phương, Năm) nếu có, thêm "Tệp nguồn" khi ghép nhiều tệp; để trống là so cả dòng
+    key_columns = st.multiselect("Cột khoá để xét trùng (để trống: so sánh toàn bộ dòng)", df.columns, default=default_keys(df.columns))
+    # Băm mỗi dòng một lần cho mỗi phiên bản dữ liệu, dùng chung cho số lượng, nhóm và dòng đại diện
+    duplicates = find_duplicates(df, pipeline.version(), key_columns)
+    num_duplicates = duplicates.n_duplicates
     if num_duplicates == 0:
         st.success("✅ Không có dòng trùng lặp.")
     else:
-        st.warning(f"⚠️ Có {num_duplicates} dòng trùng lặp trong dữ liệu.")
-        st.dataframe(df[df.duplicated(keep=False)])
-        if num_duplicates > 0 and st.button("Xoá dòng trùng"):
-            df = df.drop_duplicates()
-            st.success("✅ Đã xoá dòng trùng lặp.")
+        st.warning(f"⚠️ Có {num_duplicates} dòng trùng lặp trong {duplicates.n_groups} nhóm.")
+        st.markdown("**Dòng đại diện của từng nhóm:**")
+        st.dataframe(duplicates.representatives(df))
+        with st.expander("Xem tất cả các dòng trùng"):
+            st.dataframe(duplicates.groups(df))
+        if st.button("Xoá dòng trùng"):
+            step = Step.make("drop_duplicates", subset=key_columns) if key_columns else Step.make("drop_duplicates")
+            apply_step(step, "✅ Đã xoá dòng trùng lặp.")
 
     # Bước 5: Chuyển đổi kiểu dữ liệu
     st.subheader("🔁 Chuyển đổi kiểu dữ liệu")
     col_to_convert = st.selectbox("Chọn cột cần chuyển", df.columns)
     target_type = st.selectbox("Kiểu dữ liệu muốn chuyển", ["int", "float", "str"])
     if st.button("Chuyển đổi kiểu dữ liệu"):
-        try:
-            if target_type == "int":
-                df[col_to_convert] = df[col_to_convert].astype(int)
-            elif target_type == "float":
-                df[col_to_convert] = df[col_to_convert].astype(float)
-            else:
-                df[col_to_convert] = df[col_to_convert].astype(str)
-            st.success(f"✅ Đã chuyển '{col_to_convert}' sang kiểu {target_type}.")
-        except Exception as e:
-            st.error(f"❌ Lỗi khi chuyển kiểu dữ liệu: {e}")
+        apply_step(
+            Step.make("astype", column=col_to_convert, dtype=target_type),
+            f"✅ Đã chuyển '{col_to_convert}' sang kiểu {target_type}.",
+            "❌ Lỗi khi chuyển kiểu dữ liệu",
+        )
+
+    # Các bước đã ghi lại: xoá một bước chỉ tính lại các bước sau nó
+    st.subheader("🧾 Các bước đã áp dụng")
+    # Hoàn tác / làm lại chỉ dời vị trí trong lịch sử, các cột không đổi được dùng chung giữa các bước
+    col_undo, col_redo = st.columns(2)
+    if col_undo.button("↶ Hoàn tác", disabled=not pipeline.history.can_undo()):
+        pipeline.undo()
+        st.rerun()
+    redo_label = f"↷ Làm lại: {pipeline.redo_steps[0].describe()}" if pipeline.redo_steps else "↷ Làm lại"
+    if col_redo.button(redo_label, disabled=not pipeline.history.can_redo()):
+        pipeline.redo()
+        st.rerun()
+    if not pipeline.steps:
+        st.info("Chưa có bước xử lý nào, dữ liệu đang là tệp gốc.")
+    else:
+        for i, step in enumerate(pipeline.steps):
+            col_step, col_remove = st.columns([6, 1])
+            col_step.markdown(f"{i + 1}. {step.describe()}")
+            if col_remove.button("🗑️ Xoá", key=f"remove_step_{i}"):
+                pipeline.remove(i)
+                st.rerun()
+        if st.button("↩️ Bỏ tất cả các bước"):
+            pipeline.reset()
+            st.rerun()
+        # Công thức dùng lại được cho nhiều tệp: python -m utils.batch recipe.json <thư mục>
+        st.download_button("🧾 Tải công thức (JSON)", recipe_to_json(pipeline.steps), "recipe.json", mime="application/json")
 
     # Bước 6: Tải dữ liệu sau xử lý
     st.subheader("💾 Tải dữ liệu đã xử lý")
-    csv = df.to_csv(index=False).encode("utf-8")
-    st.download_button("📥 Tải xuống dữ liệu CSV", csv, "processed-data.csv", mime="text/csv")
+    # Chỉ ghi tệp khi người dùng yêu cầu; tệp đã ghi được giữ trong phiên cho phiên bản dữ liệu này
+    fmt = st.selectbox("Định dạng tệp", list(FORMATS), format_func=lambda key: FORMATS[key].label)
+    export_format = FORMATS[fmt]
+    export_key = (pipeline.version(), fmt)
+    export_data = prepared_export(*export_key)
+    if not export_format.available():
+        st.warning(f"⚠️ Cần cài đặt '{export_format.requires}' để xuất {export_format.label}.")
+    elif export_data is None:
+        if st.button("📦 Chuẩn bị tệp"):
+            with st.spinner("Đang ghi tệp..."):
+                try:
+                    export(df, *export_key)
+                except Exception as e:
+                    st.error(f"❌ Lỗi khi xuất dữ liệu: {e}")
+                else:
+                    st.rerun()
+    else:
+        st.download_button(
+            f"📥 Tải xuống dữ liệu {export_format.label}",
+            export_data,
+            f"processed-data.{export_format.extension}",
+            mime=export_format.mime,
+        )
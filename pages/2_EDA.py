@@ -1,24 +1,76 @@
+import hashlib
+
+import numpy as np
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import seaborn as sns
 import matplotlib.pyplot as plt
 
+from utils.charts import box_figure, histogram_figure, scatter_figure, scatter_mode
+from utils.filters import column_domains, filter_mask
+from utils.outliers import METHODS, outlier_scan
+from utils.profiling import describe_frame, get_profile_store, numeric_columns, ready_profiles
+from utils.streaming import column_info, describe_stats, shape_table
+from utils.uploads import can_stream, read_uploads, should_stream, stream_uploads, typing_report, uploads_key
+
+
+@st.fragment
+def render_scatter(df_filtered, num_cols):
+    """Đổi trục, màu hoặc vùng xem chỉ chạy lại biểu đồ phân tán, không chạy lại cả trang."""
+    x_axis = st.selectbox("Trục X", num_cols)
+    y_axis = st.selectbox("Trục Y", num_cols, index=1)
+    color_col = st.selectbox("Màu theo cột", [None] + df_filtered.columns.tolist())
+    x_range = y_range = None
+    if scatter_mode(len(df_filtered)) == "density":
+        # Dữ liệu lớn: vẽ mật độ điểm chia ô trên máy chủ, chỉ chia lại trong vùng đang xem
+        st.caption(f"⚡ {len(df_filtered):,} điểm: hiển thị mật độ điểm (không tô màu theo cột). Thu hẹp khoảng của trục để xem chi tiết vùng đó.")
+        ranges = []
+        for label, col in (("X", x_axis), ("Y", y_axis)):
+            low, high = float(df_filtered[col].min()), float(df_filtered[col].max())
+            ranges.append(st.slider(f"Khoảng trục {label} ({col})", min_value=low, max_value=high, value=(low, high), key=f"scatter_range_{label}_{col}") if low < high else None)
+        x_range, y_range = ranges
+    fig3 = scatter_figure(df_filtered, x_axis, y_axis, color=color_col, x_range=x_range, y_range=y_range)
+    st.plotly_chart(fig3)
+
+
 st.set_page_config(page_title="Phân tích EDA", layout="wide")
+
 st.title("Phân tích Dữ liệu Khám phá (EDA)")
 st.markdown("Chào mừng bạn đến với trang phân tích dữ liệu khám phá!")
 st.markdown("Trang này giúp bạn phân tích dữ liệu một cách dễ dàng và nhanh chóng.")
 
-uploaded_file = st.file_uploader("📂 Tải tệp dữ liệu (.csv hoặc .xlsx)", type=["csv", "xlsx"])
+uploaded_files = st.file_uploader("📂 Tải tệp dữ liệu (.csv hoặc .xlsx), có thể chọn nhiều tệp cùng lúc", type=["csv", "xlsx"], accept_multiple_files=True)
+
+if uploaded_files:
+    # Tệp CSV lớn: đọc theo khối để tính thống kê, không nạp toàn bộ vào một bảng
+    if st.toggle("🌊 Chế độ streaming (chỉ xem thống kê, dành cho tệp CSV lớn)", value=should_stream(uploaded_files), disabled=not can_stream(uploaded_files)):
+        stats = stream_uploads(uploaded_files)
+        st.info("🌊 Đang ở chế độ streaming: chỉ hiển thị thống kê tính theo từng khối dữ liệu; số giá trị duy nhất và các tứ phân vị là ước lượng. Bộ lọc và biểu đồ cần tắt chế độ này.")
+        st.markdown("**📋 Thông tin cột:**")
+        st.dataframe(column_info(stats))
+        st.subheader("📈 Thống kê mô tả")
+        st.dataframe(describe_stats(stats))
+        st.subheader("📐 Skewness & Kurtosis")
+        st.dataframe(shape_table(stats))
+        st.stop()
 
-if uploaded_file:
-    if uploaded_file.name.endswith(".csv"):
-        df = pd.read_csv(uploaded_file)
-    else:
-        df = pd.read_excel(uploaded_file)
+    # Chỉ phân tích tệp một lần cho mỗi nội dung, các lần rerun lấy lại từ bộ nhớ
+    # Nhiều tệp được căn cột và ghép thành một bảng (cột "Tệp nguồn" ghi tệp gốc)
+    df = read_uploads(uploaded_files)
 
     st.success("✅ Dữ liệu đã được tải thành công.")
+    report = typing_report(uploaded_files)
+    if report is not None and not report.empty:
+        saved = report["Trước (KB)"].sum() - report["Sau (KB)"].sum()
+        with st.expander(f"🧮 Đã tự động tối ưu kiểu dữ liệu cho {len(report)} cột, tiết kiệm {saved:,.1f} KB bộ nhớ"):
+            st.dataframe(report, hide_index=True)
     
+    # Hồ sơ thống kê của mọi cột được tính một lần trên luồng nền, cache theo phiên bản dữ liệu
+    version = uploads_key(uploaded_files)
+    profile_store = get_profile_store()
+    full_job = profile_store.job((version, None), df)
+
     # CHIA 2 TAB
     tab1, tab2 = st.tabs(["📊 Phân tích toàn bộ tập dữ liệu", "🔍 Phân tích chi tiết từng cột"])
 
@@ -26,41 +78,54 @@ if uploaded_file:
     with tab1:
         ### Lọc dữ liệu
         st.sidebar.header("🔎 Bộ lọc dữ liệu")
-        df_filtered = df.copy()
-
-        for col in df.columns:
-            if pd.api.types.is_numeric_dtype(df[col]):
-                min_val, max_val = float(df[col].min()), float(df[col].max())
-                selected_range = st.sidebar.slider(f"{col}", min_value=min_val, max_value=max_val, value=(min_val, max_val))
-                df_filtered = df_filtered[(df_filtered[col] >= selected_range[0]) & (df_filtered[col] <= selected_range[1])]
-            elif pd.api.types.is_object_dtype(df[col]) or pd.api.types.is_categorical_dtype(df[col]):
-                unique_vals = df[col].dropna().unique().tolist()
-                selected_vals = st.sidebar.multiselect(f"{col}", unique_vals, default=unique_vals)
-                df_filtered = df_filtered[df_filtered[col].isin(selected_vals)]
+        # Min/max và danh sách giá trị được tính một lần cho mỗi phiên bản dữ liệu
+        domains = column_domains(df, version)
+        selections = {}
+        for col, domain in domains.items():
+            if domain.is_range:
+                selections[col] = st.sidebar.slider(f"{col}", min_value=domain.low, max_value=domain.high, value=(domain.low, domain.high))
+            else:
+                unique_vals = list(domain.values)
+                selections[col] = st.sidebar.multiselect(f"{col}", unique_vals, default=unique_vals)
+        # Mọi điều kiện gộp thành một mask, chỉ tạo một bảng kết quả
+        mask = filter_mask(df, domains, selections)
+        df_filtered = df if mask.all() else df[mask]
+        filter_key = None if mask.all() else hashlib.sha1(np.packbits(mask)).hexdigest()
+        # Hiện ngay các cột đã tính xong, trang tự chạy lại khi luồng nền hoàn tất.
+        # Bộ lọc đổi thì huỷ job của trạng thái lọc trước (nếu còn chạy); không huỷ job dữ liệu đầy đủ vì tab 2 dùng
+        profile_key = (version, filter_key)
+        previous_key = st.session_state.get("eda_profile_key")
+        replaces = previous_key if previous_key is not None and previous_key[1] is not None else None
+        profiles = ready_profiles(profile_store.job(profile_key, df_filtered, replaces=replaces), "⏳ Đang tính thống kê cho dữ liệu đã lọc...")
+        st.session_state["eda_profile_key"] = profile_key
+        # Danh sách cột số lấy từ kiểu dữ liệu, không đổi khi hồ sơ đang được tính dần
+        num_cols = numeric_columns(df_filtered)
 
         st.markdown(f"**📦 Dữ liệu sau lọc:** ({df_filtered.shape[0]} dòng)")
         st.dataframe(df_filtered.head())
 
         # Thống kê mô tả
         st.subheader("📈 Thống kê mô tả")
-        st.dataframe(df_filtered.describe(include='all').transpose())
+        st.dataframe(describe_frame(profiles))
 
         # Skewness & Kurtosis
         st.subheader("📐 Skewness & Kurtosis")
-        num_cols = df_filtered.select_dtypes(include=['float', 'int']).columns
+        ready_cols = [col for col in num_cols if col in profiles]
         stats_df = pd.DataFrame({
-            "Skewness": df_filtered[num_cols].skew(),
-            "Kurtosis": df_filtered[num_cols].kurt()
+            "Skewness": {col: profiles[col].skew for col in ready_cols},
+            "Kurtosis": {col: profiles[col].kurt for col in ready_cols}
         })
         st.dataframe(stats_df)
 
         # Outlier
         st.subheader("🚨 Phát hiện outlier")
+        # Quét mọi cột số một lần cho mỗi phiên bản dữ liệu và bộ lọc; đổi cột / phương pháp chỉ so sánh một cột với cận đã tính
+        scan = outlier_scan(df_filtered, version, filter_key)
+        st.markdown("**Tổng quan outlier trên mọi cột số:**")
+        st.dataframe(scan.overview())
+        outlier_method = st.radio("Phương pháp", list(METHODS), format_func=METHODS.get, horizontal=True)
         selected_col_outlier = st.selectbox("Cột cần phát hiện outlier", num_cols)
-        Q1 = df_filtered[selected_col_outlier].quantile(0.25)
-        Q3 = df_filtered[selected_col_outlier].quantile(0.75)
-        IQR = Q3 - Q1
-        outliers = df_filtered[(df_filtered[selected_col_outlier] < Q1 - 1.5 * IQR) | (df_filtered[selected_col_outlier] > Q3 + 1.5 * IQR)]
+        outliers = df_filtered[scan.mask(df_filtered, selected_col_outlier, outlier_method)] if selected_col_outlier else df_filtered.iloc[:0]
         if outliers.empty:
             st.write("Không có outliers trong cột này.")
         else:
@@ -77,53 +142,54 @@ if uploaded_file:
         # Scatter
         st.subheader("🔁 Biểu đồ phân tán")
         if len(num_cols) >= 2:
-            x_axis = st.selectbox("Trục X", num_cols)
-            y_axis = st.selectbox("Trục Y", num_cols, index=1)
-            color_col = st.selectbox("Màu theo cột", [None] + df_filtered.columns.tolist())
-            fig3 = px.scatter(df_filtered, x=x_axis, y=y_axis, color=color_col if color_col != "None" else None)
-            st.plotly_chart(fig3)
+            # Tự chuyển SVG -> WebGL một trace -> ảnh mật độ theo số điểm
+            render_scatter(df_filtered, num_cols)
 
     # ========= TAB 2 =========
     with tab2:
         st.subheader("🔎 Phân tích nâng cao từng cột")
 
         selected_col = st.selectbox("📌 Chọn cột để phân tích", df.columns)
-        col_data = df[selected_col]
-
-        st.write("🔢 Kiểu dữ liệu:", col_data.dtype)
-        st.write("📏 Tổng số dòng:", len(col_data))
-        st.write("❌ Số giá trị thiếu:", col_data.isnull().sum())
-        st.write("🧮 Số giá trị duy nhất:", col_data.nunique())
-
-        if pd.api.types.is_numeric_dtype(col_data):
-            st.subheader("📊 Thống kê mô tả")
-            st.dataframe(col_data.describe())
-
-            st.write("📐 **Skewness**:", col_data.skew())
-            st.write("🎯 **Kurtosis**:", col_data.kurt())
-
-            st.subheader("🚨 Outliers theo IQR")
-            Q1 = col_data.quantile(0.25)
-            Q3 = col_data.quantile(0.75)
-            IQR = Q3 - Q1
-            outliers = col_data[(col_data < Q1 - 1.5 * IQR) | (col_data > Q3 + 1.5 * IQR)]
-            st.write(f"Số outliers: {outliers.shape[0]}")
-            st.dataframe(outliers)
-
-            st.subheader("📈 Histogram")
-            fig = px.histogram(df, x=selected_col, nbins=30)
-            st.plotly_chart(fig)
-
-            st.subheader("📦 Boxplot")
-            fig2 = px.box(df, y=selected_col)
-            st.plotly_chart(fig2)
-
+        # Đổi cột chỉ đọc lại hồ sơ đã tính, không quét lại dữ liệu
+        profile = ready_profiles(full_job, "⏳ Đang tính thống kê cho từng cột...").get(selected_col)
+        if profile is None:
+            st.info("⏳ Cột này chưa được tính xong, kết quả sẽ tự hiện khi sẵn sàng.")
         else:
-            st.subheader("📊 Phân phối giá trị phân loại")
-            value_counts = col_data.value_counts().reset_index()
-            value_counts.columns = [selected_col, 'Số lượng']
-            st.dataframe(value_counts)
-            fig = px.bar(value_counts, x=selected_col, y='Số lượng')
-            st.plotly_chart(fig)
-
-            st.write("📛 Số giá trị trống (''):", (col_data == '').sum())
+            st.write("🔢 Kiểu dữ liệu:", profile.dtype)
+            st.write("📏 Tổng số dòng:", profile.rows)
+            st.write("❌ Số giá trị thiếu:", profile.missing)
+            st.write("🧮 Số giá trị duy nhất:", profile.unique)
+
+            if profile.numeric:
+                st.subheader("📊 Thống kê mô tả")
+                st.dataframe(profile.describe())
+
+                st.write("📐 **Skewness**:", profile.skew)
+                st.write("🎯 **Kurtosis**:", profile.kurt)
+
+                st.subheader("🚨 Outliers theo IQR")
+                outliers = df[selected_col][outlier_scan(df, version).mask(df, selected_col)]
+                st.write(f"Số outliers: {outliers.shape[0]}")
+                st.dataframe(outliers)
+
+                # Chỉ gửi số đếm theo bin và thống kê hộp (đã tính sẵn trong hồ sơ cột) lên trình duyệt
+                if profile.histogram is not None:
+                    st.subheader("📈 Histogram")
+                    fig = histogram_figure(profile.histogram, selected_col)
+                    st.plotly_chart(fig)
+
+                    st.subheader("📦 Boxplot")
+                    fig2 = box_figure(profile.box, selected_col)
+                    st.plotly_chart(fig2)
+                    if profile.box.n_outliers > len(profile.box.outliers):
+                        st.caption(f"Boxplot hiển thị {len(profile.box.outliers)}/{profile.box.n_outliers} outlier (lấy mẫu đều, gồm cả giá trị lớn nhất và nhỏ nhất).")
+
+            else:
+                st.subheader("📊 Phân phối giá trị phân loại")
+                value_counts = profile.value_counts.reset_index()
+                value_counts.columns = [selected_col, 'Số lượng']
+                st.dataframe(value_counts)
+                fig = px.bar(value_counts, x=selected_col, y='Số lượng')
+                st.plotly_chart(fig)
+
+                st.write("📛 Số giá trị trống (''):", profile.empty_strings)
@@ -9,6 +9,9 @@ import os
 import json
 import base64  # thêm
 
+from utils.datasets import DATA_DIR, get_registry
+from utils.provinces import PROVINCES, canonicalize
+
 st.set_page_config(page_title="Trợ lý AI", layout="wide")
 
 st.title("🤖 Trợ lý AI")
@@ -47,6 +50,10 @@ def apply_filters(df: pd.DataFrame, filters_json: str) -> tuple[pd.DataFrame, st
                 )
                 continue
 
+            if column == "Địa phương":
+                # Chuẩn hóa tên tỉnh (vd. "TP. Hồ Chí Minh" -> "TP.Hồ Chí Minh")
+                criteria = canonicalize(criteria)
+
             try:
                 original_count = len(filtered_df)
                 filter_desc = ""
@@ -170,7 +177,9 @@ def generate_bar_chart(
         )
     try:
         top_n = int(top_n)
-        counts = df_filtered[column_name].value_counts().nlargest(top_n).reset_index()
+        # Cột category liệt kê cả các giá trị không xuất hiện (đếm = 0)
+        value_counts = df_filtered[column_name].value_counts()
+        counts = value_counts[value_counts > 0].nlargest(top_n).reset_index()
         counts.columns = [column_name, "count"]
         fig = px.bar(
             counts,
@@ -205,7 +214,8 @@ def generate_pie_chart(
         )
     try:
         top_n = int(top_n)
-        counts = df_filtered[column_name].value_counts().reset_index()
+        value_counts = df_filtered[column_name].value_counts()
+        counts = value_counts[value_counts > 0].reset_index()
         counts.columns = [column_name, "count"]
 
         if len(counts) > top_n:
@@ -323,7 +333,7 @@ def generate_line_chart(
                 st.info(
                     f"Trục X ('{x_column}') có giá trị trùng lặp. Đang tổng hợp '{y_column}' theo '{agg_label}'."
                 )
-                df_agg = df_line.groupby(x_column, as_index=False).agg(
+                df_agg = df_line.groupby(x_column, as_index=False, observed=True).agg(
                     {y_column: agg_func}
                 )
                 df_agg = df_agg.sort_values(by=x_column)
@@ -534,7 +544,7 @@ tools = types.Tool(
                     ),
                     "filters_json": types.Schema(
                         type=types.Type.STRING,
-                        description='Chuỗi JSON tùy chọn để lọc dữ liệu trước khi vẽ. Ví dụ: \'{"Địa phương": ["Hà Nội", "TP. Hồ Chí Minh"]}\'.',
+                        description='Chuỗi JSON tùy chọn để lọc dữ liệu trước khi vẽ. Ví dụ: \'{"Địa phương": ["Hà Nội", "TP.Hồ Chí Minh"]}\'.',
                         nullable=True,
                         default=None,
                     ),
@@ -601,73 +611,14 @@ if "chat_history" not in st.session_state:
     st.session_state["chat_history"] = []
 
 # --- Load DataFrames ---
-DATA_DIR = "data"
+# Bộ dữ liệu được đọc một lần cho toàn tiến trình và chỉ đọc lại khi tệp thay đổi
+registry = get_registry()
 flat_dfs = {}
-datasets_overview = "Tổng quan về các bộ dữ liệu có sẵn:\n\n"
-
-# --- Descriptions for each dataset ---
-dataset_descriptions = {
-    "Địa phương - Tiểu học": "Dữ liệu chi tiết về giáo dục tiểu học theo từng địa phương (tỉnh/thành phố).",
-    "Địa phương - Trung học cơ sở": "Dữ liệu chi tiết về giáo dục trung học cơ sở theo từng địa phương (tỉnh/thành phố).",
-    "Địa phương - Trung học phổ thông": "Dữ liệu chi tiết về giáo dục trung học phổ thông theo từng địa phương (tỉnh/thành phố).",
-    "Mẫu giáo - Địa phương": "Dữ liệu chi tiết về giáo dục mẫu giáo theo từng địa phương (tỉnh/thành phố).",
-    "Mẫu giáo - Tổng quan Mẫu giáo": "Dữ liệu tổng quan chung về tình hình giáo dục mẫu giáo trên cả nước.",
-    "Tổng quan - Chỉ số phát triển": "Các chỉ số phát triển giáo dục tổng hợp qua các năm.",
-    "Tổng quan - Tổng quan": "Dữ liệu tổng quan chung về giáo dục Việt Nam qua các năm (có thể bao gồm nhiều cấp học).",
-    "Tổng quan - Tổng quan (tất cả)": "Bộ dữ liệu tổng hợp nhất, chứa thông tin tổng quan về tất cả các cấp học qua các năm.",
-}
+datasets_overview = ""
 
 try:
-    dfs = {
-        "Địa phương": {
-            "Tiểu học": pd.read_csv(os.path.join(DATA_DIR, "dia-phuong/tieu-hoc.csv")),
-            "Trung học cơ sở": pd.read_csv(
-                os.path.join(DATA_DIR, "dia-phuong/THCS.csv")
-            ),
-            "Trung học phổ thông": pd.read_csv(
-                os.path.join(DATA_DIR, "dia-phuong/THPT.csv")
-            ),
-        },
-        "Mẫu giáo": {
-            "Địa phương": pd.read_csv(os.path.join(DATA_DIR, "mau-giao/MG.csv")),
-            "Tổng quan Mẫu giáo": pd.read_csv(
-                os.path.join(DATA_DIR, "mau-giao/tong-quan-MG.csv")
-            ),
-        },
-        "Tổng quan": {
-            "Chỉ số phát triển": pd.read_csv(
-                os.path.join(DATA_DIR, "tong-quan/chi-so-phat-trien.csv")
-            ),
-            "Tổng quan": pd.read_csv(os.path.join(DATA_DIR, "tong-quan/tong-quan.csv")),
-            "Tổng quan (tất cả)": pd.read_csv(
-                os.path.join(DATA_DIR, "tong-quan/tong-quan-all.csv")
-            ),
-        },
-    }
-    for category, sub_dfs in dfs.items():
-        for name, df in sub_dfs.items():
-            full_name = f"{category} - {name}"
-            flat_dfs[full_name] = df
-            description = dataset_descriptions.get(full_name, "Không có mô tả.")
-            # Get column types
-            try:
-                col_types = df.dtypes.apply(lambda x: str(x)).to_dict()
-                col_types_str = "\n".join(
-                    [f"    '{k}': {v}" for k, v in col_types.items()]
-                )
-            except Exception:
-                col_types_str = "Không thể lấy kiểu dữ liệu cột."
-            # Get first 5 rows
-            try:
-                f5r = df.head().to_string()
-            except Exception:
-                f5r = "Không thể lấy 5 hàng đầu tiên."
-
-            datasets_overview += f"- Tên: '{full_name}'\n"
-            datasets_overview += f"  Mô tả: {description}\n"
-            datasets_overview += f"  Cột và Kiểu dữ liệu:\n{col_types_str}\n"
-            datasets_overview += f"  5 hàng đầu tiên (f5r):\n{f5r}\n\n"
-
+    flat_dfs = registry.load_all_by_name()
+    datasets_overview = registry.overview()
 except FileNotFoundError as e:
     st.error(
         f"🚨 Lỗi tải tệp dữ liệu: {e}. Vui lòng đảm bảo các tệp dữ liệu có mặt tại đường dẫn dự kiến bắt đầu từ '{DATA_DIR}'."
@@ -703,74 +654,9 @@ if client and flat_dfs:
     )
 
     # --- List of Provinces ---
-    provinces = [
-        "An Giang",
-        "Bà Rịa - Vũng Tàu",
-        "Bắc Giang",
-        "Bắc Kạn",
-        "Bạc Liêu",
-        "Bắc Ninh",
-        "Bến Tre",
-        "Bình Định",
-        "Bình Dương",
-        "Bình Phước",
-        "Bình Thuận",
-        "Cà Mau",
-        "Cần Thơ",
-        "Cao Bằng",
-        "Đà Nẵng",
-        "Đắk Lắk",
-        "Đắk Nông",
-        "Điện Biên",
-        "Đồng Nai",
-        "Đồng Tháp",
-        "Gia Lai",
-        "Hà Giang",
-        "Hà Nam",
-        "Hà Nội",
-        "Hà Tĩnh",
-        "Hải Dương",
-        "Hải Phòng",
-        "Hậu Giang",
-        "Hòa Bình",
-        "Hưng Yên",
-        "Khánh Hòa",
-        "Kiên Giang",
-        "Kon Tum",
-        "Lai Châu",
-        "Lâm Đồng",
-        "Lạng Sơn",
-        "Lào Cai",
-        "Long An",
-        "Nam Định",
-        "Nghệ An",
-        "Ninh Bình",
-        "Ninh Thuận",
-        "Phú Thọ",
-        "Phú Yên",
-        "Quảng Bình",
-        "Quảng Nam",
-        "Quảng Ngãi",
-        "Quảng Ninh",
-        "Quảng Trị",
-        "Sóc Trăng",
-        "Sơn La",
-        "Tây Ninh",
-        "Thái Bình",
-        "Thái Nguyên",
-        "Thanh Hóa",
-        "Thừa Thiên Huế",
-        "Tiền Giang",
-        "Trà Vinh",
-        "Tuyên Quang",
-        "Vĩnh Long",
-        "Vĩnh Phúc",
-        "Yên Bái",
-        "TP.Hồ Chí Minh",
-    ]
     provinces_list_str = (
         "Danh sách các giá trị 'Địa phương' có thể có (tỉnh/thành phố):\n"
-        + ", ".join([f"'{p}'" for p in provinces])
+        + ", ".join([f"'{p}'" for p in PROVINCES])
         + "\n"
     )
     # --- End List of Provinces ---
@@ -790,7 +676,7 @@ Hướng dẫn:
 - **Lọc dữ liệu (Filtering):** Nếu người dùng yêu cầu phân tích hoặc trực quan hóa chỉ một phần dữ liệu (ví dụ: 'chỉ ở Hà Nội', 'cho năm 2022', 'chỉ các trường công lập'), hãy sử dụng tham số `filters_json`. Tham số này nhận một chuỗi JSON.
     - Định dạng JSON: `'{{"tên_cột_1": "giá_trị", "tên_cột_2": ["giá_trị_1", "giá_trị_2"]}}'`
     - Ví dụ: Để lọc dữ liệu 'Địa phương - Tiểu học' chỉ cho 'Hà Nội' năm 2021, dùng: `filters_json='{{"Địa phương": "Hà Nội", "Năm": 2021}}'`
-    - Ví dụ: Để lọc cho 'Hà Nội' và 'TP. Hồ Chí Minh', dùng: `filters_json='{{"Địa phương": ["Hà Nội", "TP. Hồ Chí Minh"]}}'`
+    - Ví dụ: Để lọc cho 'Hà Nội' và 'TP.Hồ Chí Minh', dùng: `filters_json='{{"Địa phương": ["Hà Nội", "TP.Hồ Chí Minh"]}}'`
     - Khi lọc theo 'Địa phương', hãy sử dụng tên chính xác từ danh sách được cung cấp ở trên.
     - Nếu không cần lọc, bỏ qua tham số `filters_json` hoặc đặt là `None`.
 - Khi gọi một hàm công cụ (ví dụ: `generate_histogram`), **bạn BẮT BUỘC phải cung cấp tham số `dataframe_name`** với tên chính xác của bộ dữ liệu bạn đã chọn từ danh sách trên.
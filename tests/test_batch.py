@@ -0,0 +1,50 @@
+import pandas as pd
+
+from utils.batch import read_input
+from utils.lazy import LazyFrame
+from utils.pipeline import (
+    Pipeline,
+    Step,
+    fill_statistic,
+    recipe_from_json,
+    recipe_to_json,
+)
+from utils.uploads import UploadCache
+
+CSV = (
+    "Địa phương,Năm,Số học sinh,Tỉ lệ\n"
+    'Hà Nội,2020,1.234.567,"12,5"\n'
+    "Huế,2020,822.553,\n"
+    'Huế,2021,45.120,"7,25"\n'
+    'Cần Thơ,2021,1.155,"3,5"\n'
+)
+
+
+class FakeUpload:
+    def __init__(self, name: str, data: bytes):
+        self.name = name
+        self.file_id = name
+        self._data = data
+
+    def getvalue(self) -> bytes:
+        return self._data
+
+
+def test_saved_recipe_replays_to_the_page_result(tmp_path):
+    path = tmp_path / "input.csv"
+    path.write_text(CSV, encoding="utf-8")
+
+    # Như trang Data Wrangling: tải tệp lên rồi ghi lại từng bước
+    source = UploadCache().get(FakeUpload("input.csv", path.read_bytes()))
+    pipeline = Pipeline("input", source)
+    pipeline.append(Step.make("filter", conditions=[("Số học sinh", ">", 10_000)]))
+    mean = fill_statistic(pipeline.result()["Tỉ lệ"], "mean")
+    pipeline.append(Step.make("fillna", column="Tỉ lệ", value=mean))
+    pipeline.append(Step.make("astype", column="Năm", dtype="str"))
+    expected = pipeline.result()
+
+    steps = recipe_from_json(recipe_to_json(pipeline.steps))
+    replayed = LazyFrame(read_input(str(path)), steps).collect()
+
+    pd.testing.assert_frame_equal(replayed, expected, check_exact=True)
+    assert replayed["Số học sinh"].tolist() == [1234567, 822553, 45120]
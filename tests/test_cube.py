@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.cube import EducationCube
+from utils.provinces import PROVINCES
+
+
+def _frame(provinces, years, schools):
+    return pd.DataFrame(
+        {
+            "Địa phương": pd.Categorical(provinces),
+            "Năm": years,
+            "Trường": schools,
+        }
+    )
+
+
+def test_builds_one_cell_per_row():
+    first, second = PROVINCES[0], PROVINCES[1]
+    cube = EducationCube.from_frames(
+        {"tieu_hoc": _frame([first, second, first], [2020, 2020, 2021], [1, 2, 3])}
+    )
+    assert cube.totals("tieu_hoc", 2020)["Trường"] == 3
+    assert np.nansum(cube.values) == 6
+
+
+def test_duplicate_province_year_raises():
+    first = PROVINCES[0]
+    frame = _frame([first, first], [2020, 2020], [1, 2])
+    with pytest.raises(ValueError, match="nhiều hơn một dòng"):
+        EducationCube.from_frames({"tieu_hoc": frame})
+
+
+@pytest.mark.parametrize("province", ["Không có tỉnh này", None])
+def test_unresolved_province_raises(province):
+    frame = _frame([PROVINCES[0], province], [2020, 2020], [1, 2])
+    with pytest.raises(ValueError, match="không xác định"):
+        EducationCube.from_frames({"tieu_hoc": frame})
@@ -0,0 +1,27 @@
+import pandas as pd
+
+from utils.duplicates import DuplicateReport, default_keys
+from utils.uploads import SOURCE_COLUMN, combine_frames
+
+
+def test_default_keys_of_combined_files():
+    first = pd.DataFrame(
+        {"Địa phương": ["Hà Nội", "Huế", "Huế"], "Năm": [2020, 2020, 2020]}
+    )
+    second = pd.DataFrame({"Địa phương": ["Hà Nội"], "Năm": [2020]})
+    df = combine_frames([first, second], ["a.csv", "b.csv"])
+
+    keys = default_keys(df.columns)
+    assert keys == ["Địa phương", "Năm", SOURCE_COLUMN]
+    report = DuplicateReport.from_frame(df, keys)
+    # Hà Nội 2020 có trong cả hai tệp nhưng không trùng; Huế lặp lại trong a.csv
+    assert report.n_duplicates == 1
+    assert report.duplicated("first").tolist() == [False, False, True, False]
+
+
+def test_default_keys_of_single_file():
+    assert default_keys(pd.Index(["Địa phương", "Năm", "Số trường"])) == [
+        "Địa phương",
+        "Năm",
+    ]
+    assert default_keys(pd.Index(["Địa phương", "Số trường"])) == []
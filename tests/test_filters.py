@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.filters import build_domains, filter_mask
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame(
+        {
+            "x": [1.0, 2.0, np.nan, 4.0, 5.0],
+            "n": pd.array([1, None, 3, 4, 5], dtype="Int16"),
+            "s": ["a", "b", None, "a", "c"],
+            "c": pd.Categorical(["u", "v", "u", None, "v"]),
+            "k": [7, 7, 7, 7, 7],
+        }
+    )
+
+
+def test_domains(df):
+    domains = build_domains(df)
+    assert list(domains) == ["x", "n", "s", "c"]
+    assert (domains["x"].low, domains["x"].high) == (1.0, 5.0)
+    assert domains["s"].values == ("a", "b", "c")
+
+
+def test_full_selections_keep_missing_values(df):
+    domains = build_domains(df)
+    selections = {"x": (1.0, 5.0), "n": (1.0, 5.0), "s": ["a", "b", "c"]}
+    assert filter_mask(df, domains, selections).all()
+
+
+@pytest.mark.parametrize("column", ["x", "n"])
+def test_narrowed_range_matches_between(df, column):
+    domains = build_domains(df)
+    mask = filter_mask(df, domains, {column: (2.0, 4.0)})
+    expected = df[column].between(2.0, 4.0).fillna(False).to_numpy(dtype=bool)
+    np.testing.assert_array_equal(mask, expected)
+
+
+@pytest.mark.parametrize("column", ["s", "c"])
+def test_narrowed_values_match_isin(df, column):
+    domains = build_domains(df)
+    chosen = list(domains[column].values[:1])
+    mask = filter_mask(df, domains, {column: chosen})
+    np.testing.assert_array_equal(mask, df[column].isin(chosen).to_numpy())
+
+
+def test_unknown_and_empty_selections(df):
+    domains = build_domains(df)
+    mask = filter_mask(df, domains, {"s": ["a", "không có"]})
+    np.testing.assert_array_equal(mask, df["s"].eq("a").to_numpy())
+    assert not filter_mask(df, domains, {"s": []}).any()
+
+
+def test_selections_are_combined(df):
+    domains = build_domains(df)
+    mask = filter_mask(df, domains, {"x": (1.0, 4.0), "s": ["a", "b"]})
+    expected = df["x"].between(1.0, 4.0) & df["s"].isin(["a", "b"])
+    np.testing.assert_array_equal(mask, expected.to_numpy())
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.history import History
+from utils.pipeline import Pipeline, Step
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(10_000, 4))
+    values[::7, 0] = np.nan
+    return pd.DataFrame(values, columns=list("ABCD"))
+
+
+def _column_bytes(df):
+    return df["A"].to_numpy().nbytes
+
+
+def test_fill_shares_unchanged_columns(df):
+    history = History(df)
+    before = history.nbytes()
+    history.push(df.assign(A=df["A"].fillna(0)), changed=["A"])
+    assert history.nbytes() == before + _column_bytes(df)
+    assert np.shares_memory(history.get(1)["B"].to_numpy(), df["B"].to_numpy())
+
+
+def test_undo_redo_move_between_snapshots(df):
+    history = History(df)
+    first = df.assign(A=df["A"].fillna(0))
+    history.push(first, changed=["A"])
+    history.push(first.iloc[:10], changed=None)
+
+    assert history.undo()
+    pd.testing.assert_frame_equal(history.current(), first)
+    assert history.undo()
+    assert not history.undo()
+    assert history.redo() and history.redo()
+    assert len(history.current()) == 10
+    assert not history.redo()
+
+    history.undo()
+    history.push(first.iloc[:5])
+    assert not history.can_redo()
+    assert len(history) == 3
+
+
+def test_cap_drops_oldest_snapshots_but_keeps_base_and_current(df):
+    column = _column_bytes(df)
+    history = History(df, max_bytes=6 * column)
+    for i in range(4):
+        history.push(df.assign(A=df["A"] + i), changed=["A"])
+
+    assert history.nbytes() <= 6 * column
+    assert history.get(0) is not None and history.current() is not None
+    assert history.get(1) is None
+    assert history.stats()["dropped"] > 0
+
+
+def test_pipeline_recomputes_dropped_snapshots(df):
+    steps = [
+        Step.make("fillna", column="A", value=0.0),
+        Step.make("filter", conditions=[("B", ">", 0)]),
+        Step.make("astype", column="C", dtype="str"),
+    ]
+    capped = Pipeline("capped", df, max_bytes=_column_bytes(df))
+    uncapped = Pipeline("uncapped", df)
+    for step in steps:
+        capped.append(step)
+        uncapped.append(step)
+    assert capped.history.stats()["dropped"] > 0
+
+    while capped.undo():
+        uncapped.undo()
+        pd.testing.assert_frame_equal(capped.result(), uncapped.result())
+    while capped.redo():
+        uncapped.redo()
+        pd.testing.assert_frame_equal(capped.result(), uncapped.result())
+    assert capped.steps == steps
@@ -0,0 +1,87 @@
+import pandas as pd
+import pytest
+
+from utils.lazy import LazyFrame
+from utils.pipeline import Step
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({"A": [1, 2, 3], "B": [4, 5, 6], "C": [7, 8, 9]})
+
+
+def test_consecutive_selects(df):
+    lazy = LazyFrame(df).select(["A", "B"]).select(["A"])
+    expected = lazy.collect(optimize_plan=False)
+    pd.testing.assert_frame_equal(lazy.collect(), expected)
+    assert list(expected.columns) == ["A"]
+
+
+def test_filter_between_selects(df):
+    lazy = LazyFrame(df).select(["A", "B", "C"]).filter("B", ">", 4).select(["A"])
+    expected = lazy.collect(optimize_plan=False)
+    pd.testing.assert_frame_equal(lazy.collect(), expected)
+    assert expected["A"].tolist() == [2, 3]
+
+
+def _ops(lazy):
+    return [step.op for step in lazy.optimized().steps]
+
+
+def _same_result(lazy):
+    expected = lazy.collect(optimize_plan=False)
+    pd.testing.assert_frame_equal(lazy.collect(), expected)
+    return expected
+
+
+def test_filter_pushed_before_conversion_of_other_column(df):
+    lazy = LazyFrame(df).astype("A", "float").dropna().filter("B", ">", 4)
+    assert _ops(lazy) == ["filter", "astype", "dropna"]
+    assert _same_result(lazy)["A"].tolist() == [2.0, 3.0]
+
+
+def test_filter_stays_after_conversion_of_its_column(df):
+    lazy = LazyFrame(df).fillna("B", 0).filter("B", ">", 4)
+    assert _ops(lazy) == ["fillna", "filter"]
+    _same_result(lazy)
+
+
+def test_filter_stays_after_drop_duplicates_on_subset():
+    df = pd.DataFrame({"k": [1, 1, 2], "v": [1, 5, 5]})
+    lazy = LazyFrame(df).then(Step.make("drop_duplicates", subset=["k"]))
+    lazy = lazy.filter("v", ">", 2)
+    assert _ops(lazy) == ["drop_duplicates", "filter"]
+    assert _same_result(lazy)["k"].tolist() == [2]
+
+
+def test_consecutive_filters_merged(df):
+    lazy = LazyFrame(df).filter("A", ">", 1).filter("C", "<", 9)
+    steps = lazy.optimized().steps
+    assert [step.op for step in steps] == ["filter"]
+    assert len(steps[0].kwargs["conditions"]) == 2
+    assert _same_result(lazy)["A"].tolist() == [2]
+
+
+def test_unused_columns_pruned(df):
+    lazy = LazyFrame(df).fillna("C", 0).astype("B", "float").select(["A", "B"])
+    steps = lazy.optimized().steps
+    assert [step.op for step in steps] == ["select", "astype", "select"]
+    assert steps[0].kwargs["columns"] == ("A", "B")
+    _same_result(lazy)
+
+
+def test_filter_after_select_keeps_column_order(df):
+    lazy = LazyFrame(df).select(["C", "A"]).filter("A", ">=", 2)
+    result = _same_result(lazy)
+    assert list(result.columns) == ["C", "A"]
+    assert result["C"].tolist() == [8, 9]
+
+
+def test_chunked_csv_matches_in_memory(df, tmp_path):
+    path = tmp_path / "data.csv"
+    df.to_csv(path, index=False)
+    lazy = LazyFrame(df).filter("A", ">", 1).select(["B"])
+    chunked = LazyFrame(path, lazy.steps).collect(chunksize=1)
+    pd.testing.assert_frame_equal(
+        chunked.reset_index(drop=True), lazy.collect().reset_index(drop=True)
+    )
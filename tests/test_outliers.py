@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from utils.outliers import MAD_THRESHOLD, MEAN_AD_SCALE, OutlierScan
+
+
+def test_mad_matches_modified_zscore():
+    values = pd.Series(np.random.default_rng(0).standard_t(3, 5000))
+    scan = OutlierScan.of(values.to_frame("x"))
+    median = values.median()
+    mad = (values - median).abs().median()
+    expected = 0.6745 * (values - median).abs() / mad > MAD_THRESHOLD
+    assert (scan.mask(values.to_frame("x"), "x", "mad") == expected.to_numpy()).all()
+
+
+def test_mad_zero_falls_back_to_mean_absolute_deviation():
+    # Hơn nửa cột là 5 nên MAD = 0
+    df = pd.DataFrame({"x": [5.0] * 7 + [6.0, 4.0, 40.0]})
+    scan = OutlierScan.of(df)
+    mean_ad = (df["x"] - 5.0).abs().mean()
+    expected = (df["x"] - 5.0).abs() / (MEAN_AD_SCALE * mean_ad) > MAD_THRESHOLD
+    mask = scan.mask(df, "x", "mad")
+    assert (mask == expected.to_numpy()).all()
+    assert mask.tolist() == [False] * 9 + [True]
+    low, high = scan.bounds("mad")[0]
+    assert low < 5.0 < high
+
+
+def test_constant_column_has_no_mad_outliers():
+    df = pd.DataFrame({"x": [3.0] * 10, "y": [1.0] * 9 + [np.nan]})
+    scan = OutlierScan.of(df)
+    assert scan.counts["mad"].tolist() == [0, 0]
+    assert not scan.mask(df, "x", "mad").any()
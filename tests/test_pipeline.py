@@ -0,0 +1,17 @@
+import json
+
+import pandas as pd
+
+from utils.pipeline import Step, fill_statistic, recipe_to_json
+
+
+def test_fill_statistics_of_compact_columns_are_plain_values():
+    series = pd.Series([1977.9757, 1978.5, None], dtype="float32")
+    mean = fill_statistic(series, "mean")
+    assert type(mean) is float
+    assert mean == series.astype("float64").mean()
+    assert fill_statistic(series, "mode") == 1977.9757
+    assert type(fill_statistic(pd.Series([3, 3, 1], dtype="int16"), "mode")) is int
+
+    recipe = recipe_to_json([Step.make("fillna", column="Năm", value=mean)])
+    assert json.loads(recipe)[0]["params"]["value"] == mean
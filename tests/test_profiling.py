@@ -0,0 +1,32 @@
+import pandas as pd
+
+from utils.profiling import ProfileStore, numeric_columns
+
+
+def test_evicted_job_is_cancelled_and_recreated():
+    df = pd.DataFrame({"a": range(10), "b": list("abcdefghij")})
+    store = ProfileStore(max_entries=1)
+    first = store.job("v1", df)
+    store.job("v2", df)
+
+    assert first.cancelled
+    again = store.job("v1", df)
+    assert again is not first
+    again._finished.wait(5)
+    assert set(again.profiles) == {"a", "b"}
+
+
+def test_finished_job_survives_being_replaced():
+    df = pd.DataFrame({"a": range(10)})
+    store = ProfileStore()
+    first = store.job("v1", df)
+    first._finished.wait(5)
+    store.job("v2", df, replaces="v1")
+
+    assert not first.cancelled
+    assert store.job("v1", df) is first
+
+
+def test_numeric_columns_skips_bool_and_text():
+    df = pd.DataFrame({"n": [1.0], "i": [1], "flag": [True], "s": ["x"]})
+    assert numeric_columns(df) == ["n", "i"]
@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+
+from utils.schema import infer_dtypes
+
+
+def _infer(values):
+    typed, _ = infer_dtypes(pd.DataFrame({"x": values}, dtype=object))
+    return typed["x"]
+
+
+@pytest.mark.parametrize(
+    "values, expected",
+    [
+        # Kiểu Việt Nam: chấm ngăn hàng nghìn, phẩy thập phân
+        (["1.234.567", "12,5", "3"], [1234567, 12.5, 3]),
+        # Chỉ một nhóm hàng nghìn ở mọi giá trị: vẫn là số nguyên
+        (["822.553", "45.120", "130.004", "1.155"], [822553, 45120, 130004, 1155]),
+        # Kiểu Anh: phẩy ngăn hàng nghìn, chấm thập phân
+        (["1,234,567.5", "12.25", "3"], [1234567.5, 12.25, 3]),
+        # Thông thường
+        (["1.5", "0.125", "-3", "2e3"], [1.5, 0.125, -3, 2000]),
+    ],
+)
+def test_numbers_stored_as_text(values, expected):
+    series = _infer(values)
+    assert pd.api.types.is_numeric_dtype(series)
+    assert series.astype("float64").tolist() == pytest.approx(expected)
+
+
+def test_one_group_thousands_stay_integers():
+    series = _infer(["822.553", "1.155", None])
+    assert series.astype("float64").tolist()[:2] == [822553.0, 1155.0]
+    assert series.isna().tolist() == [False, False, True]
+
+
+def test_text_stays_text():
+    assert not pd.api.types.is_numeric_dtype(_infer(["Hà Nội", "12", "Huế"]))
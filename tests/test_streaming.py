@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.streaming import (
+    HyperLogLog,
+    Moments,
+    QuantileSketch,
+    moment_stats,
+    stream_csv,
+)
+
+
+@pytest.fixture
+def values():
+    rng = np.random.default_rng(1)
+    return np.concatenate([rng.lognormal(size=30_000), rng.normal(50, 5, 20_000)])
+
+
+def _chunks(values, sizes=(1, 7, 1000, 0, 12_345)):
+    bounds = np.cumsum(sizes)
+    return np.split(values, bounds[bounds < len(values)])
+
+
+def test_merged_moments_match_pandas(values):
+    merged = Moments()
+    for chunk in _chunks(values):
+        merged.merge(Moments.of(chunk))
+    series = pd.Series(values)
+
+    assert merged.n == len(values)
+    assert merged.mean == pytest.approx(series.mean(), rel=1e-12)
+    std, skew, kurt = moment_stats(merged.n, merged.m2, merged.m3, merged.m4)
+    assert std == pytest.approx(series.std(), rel=1e-9)
+    assert skew == pytest.approx(series.skew(), rel=1e-9)
+    assert kurt == pytest.approx(series.kurt(), rel=1e-9)
+
+
+def test_small_sketch_is_exact(values):
+    sketch = QuantileSketch()
+    sketch.update(values[:1000])
+    qs = [0.0, 0.1, 0.25, 0.5, 0.9, 1.0]
+    np.testing.assert_allclose(sketch.quantiles(qs), np.quantile(values[:1000], qs))
+
+
+def test_merged_sketch_rank_error(values):
+    merged = QuantileSketch()
+    for i, chunk in enumerate(_chunks(values)):
+        part = QuantileSketch(seed=i)
+        part.update(chunk)
+        merged.merge(part)
+    qs = np.array([0.01, 0.25, 0.5, 0.75, 0.99])
+    ordered = np.sort(values)
+    ranks = np.searchsorted(ordered, merged.quantiles(qs)) / len(values)
+    np.testing.assert_allclose(ranks, qs, atol=0.01)
+
+
+def test_hyperloglog_merge_equals_union():
+    rng = np.random.default_rng(2)
+    left, right = rng.integers(0, 60_000, 80_000), rng.integers(40_000, 100_000, 80_000)
+    merged, union = HyperLogLog(), HyperLogLog()
+    merged.update(left)
+    other = HyperLogLog()
+    other.update(right)
+    merged.merge(other)
+    union.update(np.concatenate([left, right]))
+
+    np.testing.assert_array_equal(merged.registers, union.registers)
+    exact = pd.Series(np.concatenate([left, right])).nunique()
+    assert merged.count() == pytest.approx(exact, rel=0.03)
+
+
+def test_hyperloglog_small_counts():
+    sketch = HyperLogLog()
+    sketch.update(np.array(["a", "b", "c"] * 100, dtype=object))
+    assert sketch.count() == 3
+
+
+def test_stream_csv_matches_describe(values, tmp_path):
+    df = pd.DataFrame({"x": values, "s": np.where(values > 10, "big", "small")})
+    df.loc[::11, "x"] = np.nan
+    path = tmp_path / "data.csv"
+    df.to_csv(path, index=False)
+    stats = stream_csv(path, chunksize=4096)
+
+    expected = pd.read_csv(path)["x"].describe()
+    described = stats["x"].describe()
+    for key in ("count", "mean", "std", "min", "max"):
+        assert described[key] == pytest.approx(expected[key], rel=1e-9)
+    assert stats["s"].describe()["unique"] == 2
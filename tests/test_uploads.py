@@ -0,0 +1,58 @@
+import pandas as pd
+
+from utils.schema import memory_footprint
+from utils.uploads import SOURCE_COLUMN, UploadBudget, UploadCache
+
+
+class FakeUpload:
+    """Minimal stand-in for a ``st.file_uploader`` result."""
+
+    def __init__(self, name: str, data: bytes):
+        self.name = name
+        self.file_id = name
+        self._data = data
+
+    def getvalue(self) -> bytes:
+        return self._data
+
+
+A = FakeUpload(
+    "a.csv", "Địa phương,Năm,Số trường\nHà Nội,2020,1.1\nHuế,2020,2\n".encode()
+)
+B = FakeUpload(
+    "b.csv", "Địa phương,Năm,Số trường\nHà Nội,2021,3\nHuế,2021,x\n".encode()
+)
+
+
+def test_combined_upload_does_not_depend_on_history():
+    fresh = UploadCache().get_combined([A, B])
+
+    cache = UploadCache()
+    cache.get(A)
+    after_single = cache.get_combined([A, B])
+
+    pd.testing.assert_frame_equal(fresh, after_single, check_exact=True)
+    assert fresh[SOURCE_COLUMN].tolist() == ["a.csv"] * 2 + ["b.csv"] * 2
+
+
+def test_combined_upload_is_cached():
+    cache = UploadCache()
+    first = cache.get_combined([A, B])
+    second = cache.get_combined([A, B])
+    pd.testing.assert_frame_equal(first, second)
+    assert cache.stats()["entries"] == 1
+
+
+def test_shared_budget_evicts_across_sessions():
+    size = memory_footprint(UploadCache().get(A))
+    budget = UploadBudget(max_bytes=int(size * 1.5))
+    first, second = UploadCache(budget=budget), UploadCache(budget=budget)
+    first.get(A)
+    second.get(A)
+
+    assert first.stats()["entries"] == 0
+    assert second.stats()["entries"] == 1
+    assert budget.stats()["entries"] == 1
+
+    del second
+    assert budget.stats() == {"entries": 0, "bytes": 0}
@@ -0,0 +1 @@
+"""Các module dùng chung cho các trang của Graphora."""
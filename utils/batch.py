@@ -0,0 +1,168 @@
+"""
+Headless batch runner for saved wrangling recipes.
+
+``python -m utils.batch RECIPE INPUT_DIR [-o OUTPUT_DIR] [-j WORKERS] [--snapshot]``
+runs a recipe saved from the Data Wrangling page (``recipe_to_json``) over
+every CSV/XLSX file under ``INPUT_DIR`` in a process pool. Inputs are typed
+with ``utils.schema.infer_dtypes`` like uploads, and each result gets
+the compact schema (``utils.schema.apply_schema``) and is written as CSV to
+the same relative path under ``OUTPUT_DIR`` (``data/`` by default), so
+``raw/dia-phuong/THCS.xlsx`` becomes ``data/dia-phuong/THCS.csv``. With
+``--snapshot`` the typed Arrow snapshot of the output directory is rebuilt
+afterwards. Per-file read/run/write timings are printed as files finish.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+
+import pandas as pd
+
+from utils.lazy import LazyFrame
+from utils.pipeline import Step, recipe_from_json
+from utils.schema import apply_schema, infer_dtypes
+
+INPUT_EXTENSIONS = (".csv", ".xlsx")
+
+
+@dataclass(frozen=True)
+class FileResult:
+    source: str
+    output: str
+    rows: int
+    columns: int
+    read_s: float
+    run_s: float
+    write_s: float
+
+
+def read_input(path: str) -> pd.DataFrame:
+    """
+    Parses a CSV (BOM-tolerant) or Excel input, strips header whitespace and
+    infers compact dtypes exactly as an upload to the Data Wrangling page is,
+    so a recipe recorded there sees the same column types here.
+    """
+    if path.lower().endswith(".csv"):
+        df = pd.read_csv(path, encoding="utf-8-sig")
+    else:
+        df = pd.read_excel(path)
+    df.columns = df.columns.astype(str).str.strip()
+    return infer_dtypes(df)[0]
+
+
+def find_inputs(input_dir: str) -> list[str]:
+    """Relative paths of every CSV/XLSX file under ``input_dir``, sorted."""
+    found = []
+    for root, dirs, files in os.walk(input_dir):
+        # Bỏ qua thư mục ẩn (ví dụ .snapshot)
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in files:
+            if name.lower().endswith(INPUT_EXTENSIONS):
+                found.append(os.path.relpath(os.path.join(root, name), input_dir))
+    return sorted(found)
+
+
+def output_path(output_dir: str, relative: str) -> str:
+    return os.path.join(output_dir, os.path.splitext(relative)[0] + ".csv")
+
+
+def run_file(steps: list[Step], source: str, output: str) -> FileResult:
+    """Runs the recipe on one file; executed in a worker process."""
+    start = time.perf_counter()
+    df = read_input(source)
+    read_done = time.perf_counter()
+    df = apply_schema(LazyFrame(df, steps).collect())
+    run_done = time.perf_counter()
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    tmp_path = output + ".tmp"
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, output)
+    write_done = time.perf_counter()
+    return FileResult(
+        source,
+        output,
+        len(df),
+        df.shape[1],
+        read_done - start,
+        run_done - read_done,
+        write_done - run_done,
+    )
+
+
+def run_batch(steps, input_dir: str, output_dir: str, workers: int | None = None):
+    """
+    Runs ``steps`` over every input file in parallel. Yields a
+    ``(relative_path, FileResult | Exception)`` pair as each file finishes.
+    """
+    inputs = find_inputs(input_dir)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(
+                run_file,
+                list(steps),
+                os.path.join(input_dir, relative),
+                output_path(output_dir, relative),
+            ): relative
+            for relative in inputs
+        }
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as e:
+                yield futures[future], e
+
+
+def main(argv: list[str]) -> int:
+    from utils.datasets import DATA_DIR
+
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.batch",
+        description="Chạy công thức xử lý dữ liệu cho mọi tệp CSV/XLSX trong một thư mục.",
+    )
+    parser.add_argument("recipe", help="tệp công thức JSON tải từ trang Data Wrangling")
+    parser.add_argument("input_dir", help="thư mục chứa các tệp cần xử lý")
+    parser.add_argument("-o", "--output", default=DATA_DIR, help="thư mục ghi kết quả")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="số tiến trình")
+    parser.add_argument(
+        "--snapshot", action="store_true", help="tạo lại snapshot Arrow sau khi ghi"
+    )
+    args = parser.parse_args(argv)
+
+    with open(args.recipe, encoding="utf-8") as f:
+        steps = recipe_from_json(f.read())
+    for i, step in enumerate(steps):
+        print(f"{i + 1}. {step.describe()}")
+    print()
+
+    start = time.perf_counter()
+    failures = 0
+    for relative, result in run_batch(steps, args.input_dir, args.output, args.workers):
+        if isinstance(result, Exception):
+            failures += 1
+            print(f"{relative:<40} LỖI: {type(result).__name__}: {result}")
+            continue
+        print(
+            f"{relative:<40} {result.rows:>8} dòng  "
+            f"đọc {result.read_s:.2f}s  xử lý {result.run_s:.2f}s  "
+            f"ghi {result.write_s:.2f}s  -> {result.output}"
+        )
+    print(f"\nHoàn tất trong {time.perf_counter() - start:.2f}s, {failures} tệp lỗi")
+
+    if args.snapshot and not failures:
+        from utils import snapshot
+
+        try:
+            snapshot.build(args.output)
+        except FileNotFoundError as e:
+            print(f"Không tạo được snapshot (thiếu tệp trong danh mục): {e}")
+            return 1
+        print(f"Đã tạo lại snapshot trong {snapshot.snapshot_dir(args.output)}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,368 @@
+"""
+Plotly figure builders shared by the pages.
+
+Builders return figures whose size does not grow with the data beyond one
+trace per series: labels are rendered by the trace itself (text templates)
+rather than as one layout annotation per cell.
+
+Distribution charts are aggregated on the server: ``Histogram`` and
+``BoxSummary`` reduce a column to bin counts and box statistics with
+vectorized NumPy, so the figure carries a few dozen numbers (plus at most
+``MAX_BOX_POINTS`` outliers) whatever the number of rows.
+
+``scatter_figure`` picks a renderer by size: Plotly Express SVG for small
+frames with few colour groups, a single WebGL trace (one colour per point
+instead of one trace per group) for medium frames, and a server-side 2-D
+density image (``Density2D``) for large ones, binned only over the requested
+x/y window so zooming in re-bins at full resolution.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+# Đỏ (giảm) - trắng (không đổi) - xanh (tăng)
+DIVERGING = [[0.0, "red"], [0.5, "white"], [1.0, "green"]]
+# Màu mặc định của Plotly Express cho chuỗi đầu tiên
+DEFAULT_COLOR = "#636efa"
+HISTOGRAM_BINS = 30
+# Số outlier tối đa gửi lên trình duyệt cho một boxplot
+MAX_BOX_POINTS = 1000
+# Ngưỡng chuyển chế độ vẽ scatter: SVG -> WebGL một trace -> ảnh mật độ
+SCATTER_SVG_MAX_POINTS = 2_000
+SCATTER_SVG_MAX_GROUPS = 10
+SCATTER_WEBGL_MAX_POINTS = 200_000
+DENSITY_BINS = 150
+
+
+def annotated_heatmap(
+    matrix: pd.DataFrame,
+    colorscale=DIVERGING,
+    symmetric: bool = False,
+    texttemplate: str = "%{z:.1f}%",
+) -> go.Figure:
+    """
+    Labelled heatmap of ``matrix`` (rows on y, columns on x) as a single
+    ``go.Heatmap`` trace, laid out like ``ff.create_annotated_heatmap``.
+    ``symmetric`` centres the colour scale on zero.
+    """
+    z = matrix.to_numpy(dtype="float64")
+    trace = go.Heatmap(
+        z=z,
+        x=[str(col) for col in matrix.columns],
+        y=[str(idx) for idx in matrix.index],
+        colorscale=colorscale,
+        showscale=True,
+        texttemplate=texttemplate,
+        hovertemplate="%{y} - %{x}: " + texttemplate + "<extra></extra>",
+    )
+    if symmetric and np.isfinite(z).any():
+        bound = float(np.nanmax(np.abs(z)))
+        trace.update(zmin=-bound, zmax=bound)
+    fig = go.Figure(trace)
+    fig.update_layout(
+        xaxis=dict(ticks="", dtick=1, side="top", gridcolor="rgb(0, 0, 0)"),
+        yaxis=dict(ticks="", dtick=1, ticksuffix="  "),
+    )
+    return fig
+
+
+def _nice_bin_size(span: float, nbins: int) -> float:
+    """Smallest 1/2/5 x 10^k bin width giving at most ``nbins`` bins."""
+    raw = span / nbins
+    magnitude = 10.0 ** np.floor(np.log10(raw))
+    for step in (1, 2, 5, 10):
+        if raw <= step * magnitude:
+            return step * magnitude
+    return 10 * magnitude
+
+
+@dataclass(frozen=True)
+class Histogram:
+    edges: np.ndarray
+    counts: np.ndarray
+
+    @classmethod
+    def of(cls, values: np.ndarray, nbins: int = HISTOGRAM_BINS) -> "Histogram":
+        """Bins ``values`` (float64, no NaN) into ``[edge, next edge)`` bins."""
+        if not len(values):
+            return cls(np.array([0.0, 1.0]), np.array([0]))
+        low, high = float(values.min()), float(values.max())
+        if low == high:
+            size = 1.0
+        else:
+            size = _nice_bin_size(high - low, nbins)
+        start = np.floor(low / size) * size
+        # Dữ liệu số nguyên: bin rộng ít nhất 1, cột nằm giữa các số nguyên như Plotly
+        if np.array_equal(values, np.floor(values)):
+            size = max(size, 1.0)
+            start = np.floor(low / size) * size - 0.5
+        n = int((high - start) // size) + 1
+        positions = np.minimum(((values - start) // size).astype(np.int64), n - 1)
+        counts = np.bincount(positions, minlength=n)
+        return cls(start + size * np.arange(n + 1), counts)
+
+    @property
+    def centers(self) -> np.ndarray:
+        return (self.edges[:-1] + self.edges[1:]) / 2
+
+
+@dataclass(frozen=True)
+class BoxSummary:
+    q1: float
+    median: float
+    q3: float
+    lowerfence: float
+    upperfence: float
+    # Mẫu outlier đã giới hạn (gồm cả hai giá trị cực trị) và tổng số outlier
+    outliers: np.ndarray
+    n_outliers: int
+
+    @classmethod
+    def of(
+        cls,
+        values: np.ndarray,
+        quartiles: tuple[float, float, float] | None = None,
+        max_points: int = MAX_BOX_POINTS,
+    ) -> "BoxSummary":
+        """
+        Box statistics of ``values`` (float64, no NaN, not empty) with 1.5 IQR
+        whiskers; ``quartiles`` skips recomputing them when already known.
+        """
+        if quartiles is None:
+            quartiles = tuple(float(q) for q in np.quantile(values, (0.25, 0.5, 0.75)))
+        q1, median, q3 = quartiles
+        low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+        inside = (values >= low) & (values <= high)
+        outliers = np.sort(values[~inside])
+        if len(outliers) > max_points:
+            keep = (
+                np.linspace(0, len(outliers) - 1, max_points).round().astype(np.int64)
+            )
+            outliers = outliers[np.unique(keep)]
+        return cls(
+            q1,
+            median,
+            q3,
+            float(values[inside].min()),
+            float(values[inside].max()),
+            outliers,
+            int((~inside).sum()),
+        )
+
+
+def histogram_figure(histogram: Histogram, name: str) -> go.Figure:
+    """Pre-binned equivalent of ``px.histogram(df, x=name)``."""
+    fig = go.Figure(
+        go.Bar(
+            x=histogram.centers,
+            y=histogram.counts,
+            width=np.diff(histogram.edges),
+            marker_color=DEFAULT_COLOR,
+            customdata=np.column_stack([histogram.edges[:-1], histogram.edges[1:]]),
+            hovertemplate=name
+            + " = [%{customdata[0]:.4g}, %{customdata[1]:.4g})<br>count = %{y}<extra></extra>",
+        )
+    )
+    fig.update_layout(bargap=0, xaxis_title=name, yaxis_title="count")
+    return fig
+
+
+def box_figure(box: BoxSummary, name: str) -> go.Figure:
+    """Precomputed equivalent of ``px.box(df, y=name)``."""
+    fig = go.Figure(
+        go.Box(
+            x=[name],
+            q1=[box.q1],
+            median=[box.median],
+            q3=[box.q3],
+            lowerfence=[box.lowerfence],
+            upperfence=[box.upperfence],
+            name=name,
+            marker_color=DEFAULT_COLOR,
+            boxpoints=False,
+            showlegend=False,
+        )
+    )
+    if len(box.outliers):
+        fig.add_trace(
+            go.Scatter(
+                x=[name] * len(box.outliers),
+                y=box.outliers,
+                mode="markers",
+                marker=dict(color=DEFAULT_COLOR, size=6, opacity=0.8),
+                name="outlier",
+                showlegend=False,
+                hovertemplate=name + " = %{y}<extra></extra>",
+            )
+        )
+    fig.update_layout(yaxis_title=name, xaxis_showticklabels=False)
+    return fig
+
+
+def scatter_mode(n_points: int, n_groups: int = 1) -> str:
+    """ "svg", "webgl" or "density" for a scatter of ``n_points`` in ``n_groups`` colours."""
+    if n_points > SCATTER_WEBGL_MAX_POINTS:
+        return "density"
+    if n_points > SCATTER_SVG_MAX_POINTS or n_groups > SCATTER_SVG_MAX_GROUPS:
+        return "webgl"
+    return "svg"
+
+
+@dataclass(frozen=True)
+class Density2D:
+    x_edges: np.ndarray
+    y_edges: np.ndarray
+    # counts[i, j]: số điểm trong ô hàng y thứ i, cột x thứ j
+    counts: np.ndarray
+
+    @classmethod
+    def of(
+        cls,
+        x: np.ndarray,
+        y: np.ndarray,
+        x_range: tuple[float, float] | None = None,
+        y_range: tuple[float, float] | None = None,
+        bins: int = DENSITY_BINS,
+    ) -> "Density2D":
+        """
+        ``bins`` x ``bins`` point counts of the finite (x, y) pairs inside
+        ``x_range`` and ``y_range`` (the data extent when omitted).
+        """
+        keep = np.isfinite(x) & np.isfinite(y)
+        x, y = x[keep], y[keep]
+        x_range = x_range or ((x.min(), x.max()) if len(x) else (0.0, 1.0))
+        y_range = y_range or ((y.min(), y.max()) if len(y) else (0.0, 1.0))
+        inside = (x >= x_range[0]) & (x <= x_range[1])
+        inside &= (y >= y_range[0]) & (y <= y_range[1])
+        x_edges = np.linspace(x_range[0], x_range[1], bins + 1)
+        y_edges = np.linspace(y_range[0], y_range[1], bins + 1)
+        cells = _bin_index(x[inside], x_range, bins)
+        cells += bins * _bin_index(y[inside], y_range, bins)
+        counts = np.bincount(cells, minlength=bins * bins).reshape(bins, bins)
+        return cls(x_edges, y_edges, counts)
+
+
+def _bin_index(values: np.ndarray, bounds: tuple[float, float], bins: int):
+    span = bounds[1] - bounds[0]
+    if span <= 0:
+        return np.zeros(len(values), dtype=np.int64)
+    index = ((values - bounds[0]) * (bins / span)).astype(np.int64)
+    return np.minimum(index, bins - 1)
+
+
+def density_figure(density: Density2D, x_title: str, y_title: str) -> go.Figure:
+    """The density as one heatmap trace; empty cells are left transparent."""
+    z = density.counts.astype("float64")
+    z[z == 0] = np.nan
+    fig = go.Figure(
+        go.Heatmap(
+            x=(density.x_edges[:-1] + density.x_edges[1:]) / 2,
+            y=(density.y_edges[:-1] + density.y_edges[1:]) / 2,
+            z=z,
+            colorscale="Viridis",
+            colorbar=dict(title="Số điểm"),
+            hovertemplate=x_title
+            + " ≈ %{x:.4g}<br>"
+            + y_title
+            + " ≈ %{y:.4g}<br>Số điểm: %{z}<extra></extra>",
+        )
+    )
+    fig.update_layout(xaxis_title=x_title, yaxis_title=y_title)
+    return fig
+
+
+def _category_colors(series: pd.Series) -> dict:
+    """Marker colours of a text column as group codes on a stepped colour scale."""
+    # Mã số thay cho chuỗi màu từng điểm (Plotly kiểm tra chuỗi màu rất chậm)
+    palette = px.colors.qualitative.Plotly + ["#999999"]
+    codes, _ = pd.factorize(series)
+    codes = np.where(codes < 0, len(palette) - 1, codes % (len(palette) - 1))
+    scale = []
+    for i, color in enumerate(palette):
+        scale += [[i / len(palette), color], [(i + 1) / len(palette), color]]
+    return dict(color=codes, colorscale=scale, cmin=-0.5, cmax=len(palette) - 0.5)
+
+
+def _webgl_scatter(
+    df: pd.DataFrame, x: str, y: str, color=None, size=None, hover_name=None
+) -> go.Figure:
+    marker = dict(color=DEFAULT_COLOR)
+    hover = [f"{x}=%{{x}}", f"{y}=%{{y}}"]
+    customdata = None
+    if color is not None:
+        if pd.api.types.is_numeric_dtype(df[color]):
+            marker.update(
+                color=df[color].to_numpy(dtype="float64", na_value=np.nan),
+                colorscale="Plasma",
+                showscale=True,
+                colorbar=dict(title=color),
+            )
+        else:
+            # Một trace, màu theo mã nhóm thay vì một trace cho mỗi nhóm
+            marker.update(_category_colors(df[color]))
+        customdata = df[color].astype(str).to_numpy()
+        hover.insert(0, f"{color}=%{{customdata}}")
+    if size is not None:
+        sizes = df[size].to_numpy(dtype="float64", na_value=np.nan)
+        largest = np.nanmax(sizes) if np.isfinite(sizes).any() else 1.0
+        # Cùng tỉ lệ với px.scatter(size=...): diện tích, điểm lớn nhất đường kính 20px
+        marker.update(size=sizes, sizemode="area", sizeref=2.0 * largest / 20**2)
+    template = "<br>".join(hover)
+    if hover_name is not None:
+        template = "<b>%{hovertext}</b><br><br>" + template
+    trace = go.Scattergl(
+        x=df[x].to_numpy(),
+        y=df[y].to_numpy(),
+        mode="markers",
+        marker=marker,
+        customdata=customdata,
+        hovertext=None if hover_name is None else df[hover_name].astype(str).to_numpy(),
+        hovertemplate=template + "<extra></extra>",
+        showlegend=False,
+    )
+    return go.Figure(trace)
+
+
+def scatter_figure(
+    df: pd.DataFrame,
+    x: str,
+    y: str,
+    color: str | None = None,
+    size: str | None = None,
+    hover_name: str | None = None,
+    title: str | None = None,
+    x_range: tuple[float, float] | None = None,
+    y_range: tuple[float, float] | None = None,
+) -> go.Figure:
+    """
+    ``px.scatter`` that stays responsive on large frames (see ``scatter_mode``).
+    Colour, size and hover name are dropped in density mode, which bins only
+    the ``x_range`` x ``y_range`` window.
+    """
+    groups = 1
+    if color is not None and not pd.api.types.is_numeric_dtype(df[color]):
+        groups = df[color].nunique()
+    mode = scatter_mode(len(df), groups)
+    if mode == "svg":
+        fig = px.scatter(
+            df, x=x, y=y, color=color, size=size, hover_name=hover_name, title=title
+        )
+    elif mode == "webgl":
+        fig = _webgl_scatter(df, x, y, color, size, hover_name)
+    else:
+        density = Density2D.of(
+            df[x].to_numpy(dtype="float64", na_value=np.nan),
+            df[y].to_numpy(dtype="float64", na_value=np.nan),
+            x_range,
+            y_range,
+        )
+        fig = density_figure(density, x, y)
+    if x_range is not None and mode != "density":
+        fig.update_xaxes(range=list(x_range))
+    if y_range is not None and mode != "density":
+        fig.update_yaxes(range=list(y_range))
+    return fig.update_layout(title=title, xaxis_title=x, yaxis_title=y)
@@ -0,0 +1,183 @@
+"""
+Dense province × year × level × metric cube for the dashboard.
+
+The four province tables are scattered once into one float32 NumPy array, so
+the level tabs read KPI totals, per-province rankings, maps and per-province
+time series as array slices instead of re-filtering and re-summing pandas
+frames on every rerun. Cells with no source row are NaN. Totals are
+accumulated in float64 but values are stored to float32 precision: whole
+counts are exact, fractional ones (Mẫu giáo ``Học sinh`` in thousands) are
+rounded, so their totals differ from pandas by about 1e-5.
+
+Values keep their source units: ``Học sinh`` for Mẫu giáo is in thousands,
+as in ``MG.csv``.
+
+Every source row must land in its own cell: a row whose province is missing
+or not in ``utils.provinces``, or two rows for the same (province, year) of a
+level, raise ``ValueError`` instead of being dropped or overwritten.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.datasets import get_registry
+from utils.provinces import DIMENSION, PROVINCES, province_ids
+
+# (khóa bộ dữ liệu, tên cấp học)
+LEVELS: tuple[tuple[str, str], ...] = (
+    ("tieu_hoc", "Tiểu học"),
+    ("thcs", "Trung học cơ sở"),
+    ("thpt", "Trung học phổ thông"),
+    ("mau_giao", "Mẫu giáo"),
+)
+
+METRICS: tuple[str, ...] = (
+    "Trường",
+    "Lớp",
+    "Giáo viên",
+    "Học sinh",
+    "Học sinh nữ",
+    "Học sinh nam",
+    "Giáo viên nữ",
+    "Giáo viên nam",
+    "Học sinh dân tộc thiểu số",
+    "Giáo viên dân tộc thiểu số",
+)
+
+# MG.csv dùng tên cột khác cho cùng chỉ số
+METRIC_ALIASES = {"Trường học": "Trường", "Lớp học": "Lớp"}
+
+
+def _check_cells(key: str, df: pd.DataFrame, p: np.ndarray, y: np.ndarray):
+    """Raises if a row of level ``key`` has no province id or shares its cell."""
+    unknown = p < 0
+    if unknown.any():
+        names = sorted(df.loc[unknown, "Địa phương"].astype(str).unique())
+        raise ValueError(
+            f"{key}: {int(unknown.sum())} dòng có tỉnh thiếu hoặc không xác định: "
+            f"{names}"
+        )
+    cells = p.astype(np.int64) * (int(y.max()) + 1) + y
+    duplicated = pd.Series(cells).duplicated(keep=False).to_numpy()
+    if duplicated.any():
+        rows = df.loc[duplicated, ["Địa phương", "Năm"]].drop_duplicates()
+        raise ValueError(
+            f"{key}: {len(rows)} cặp (tỉnh, năm) có nhiều hơn một dòng: "
+            f"{list(rows.itertuples(index=False, name=None))[:5]}"
+        )
+
+
+@dataclass(frozen=True)
+class EducationCube:
+    values: np.ndarray  # (tỉnh, năm, cấp học, chỉ số)
+    years: np.ndarray
+    levels: tuple[str, ...]
+    metrics: tuple[str, ...]
+
+    @classmethod
+    def from_frames(cls, frames: dict[str, pd.DataFrame]) -> "EducationCube":
+        """Builds the cube from ``{level_key: province table}``."""
+        levels = tuple(key for key, _ in LEVELS if key in frames)
+        years = np.unique(np.concatenate([frames[k]["Năm"].to_numpy() for k in levels]))
+        values = np.full(
+            (len(PROVINCES), len(years), len(levels), len(METRICS)),
+            np.nan,
+            dtype="float32",
+        )
+        for li, key in enumerate(levels):
+            df = frames[key].rename(columns=METRIC_ALIASES)
+            codes = df["Địa phương"].cat.codes.to_numpy()
+            ids = province_ids(df["Địa phương"].cat.categories)
+            p = np.where(codes < 0, -1, ids[codes])
+            y = np.searchsorted(years, df["Năm"].to_numpy())
+            _check_cells(key, df, p, y)
+            for m, metric in enumerate(METRICS):
+                if metric in df.columns:
+                    values[p, y, li, m] = df[metric].to_numpy()
+        return cls(values, years, levels, METRICS)
+
+    def _level(self, level: str) -> int:
+        return self.levels.index(level)
+
+    def _year(self, year) -> int:
+        return int(np.searchsorted(self.years, int(year)))
+
+    def _present(self, level: str) -> np.ndarray:
+        """(tỉnh, năm) mask of cells that have a source row."""
+        return ~np.isnan(self.values[:, :, self._level(level), :]).all(axis=2)
+
+    def available_metrics(self, level: str) -> list[str]:
+        block = self.values[:, :, self._level(level), :]
+        return [
+            m for i, m in enumerate(self.metrics) if not np.isnan(block[..., i]).all()
+        ]
+
+    def year_list(self, level: str) -> list[int]:
+        return [int(y) for y in self.years[self._present(level).any(axis=0)]]
+
+    def province_list(self, level: str) -> list[str]:
+        present = self._present(level).any(axis=1)
+        return sorted(name for name, ok in zip(PROVINCES, present) if ok)
+
+    def year_slice(self, level: str, year, province: str | None = None) -> pd.DataFrame:
+        """One year, all provinces (or one): ``Địa phương``, ``Lat``, ``Lon`` and metrics."""
+        li, y = self._level(level), self._year(year)
+        present = self._present(level)[:, y]
+        if province is not None:
+            present = present & (np.asarray(PROVINCES) == province)
+        rows = np.flatnonzero(present)
+        metrics = self.available_metrics(level)
+        block = self.values[rows, y, li, :]
+        df = pd.DataFrame(
+            block[:, [self.metrics.index(m) for m in metrics]], columns=metrics
+        )
+        df.insert(0, "Địa phương", DIMENSION["name"].to_numpy()[rows])
+        df.insert(1, "Lat", DIMENSION["lat"].to_numpy()[rows])
+        df.insert(2, "Lon", DIMENSION["lon"].to_numpy()[rows])
+        return df
+
+    def province_series(self, level: str, province: str) -> pd.DataFrame:
+        """One province, all years: ``Năm`` and metrics."""
+        li, p = self._level(level), PROVINCES.index(province)
+        cols = self.available_metrics(level)
+        present = self._present(level)[p]
+        block = self.values[p, present, li, :]
+        df = pd.DataFrame(block[:, [self.metrics.index(m) for m in cols]], columns=cols)
+        df.insert(0, "Năm", self.years[present])
+        return df
+
+    def totals(self, level: str, year, province: str | None = None) -> pd.Series:
+        """Metric totals for one year: national, or for a single province."""
+        li, y = self._level(level), self._year(year)
+        block = self.values[:, y, li, :]
+        if province is not None:
+            block = block[[PROVINCES.index(province)]]
+        sums = np.nansum(block, axis=0, dtype="float64")
+        metrics = self.available_metrics(level)
+        return pd.Series(sums, index=self.metrics)[metrics]
+
+    def national_totals(self, level: str) -> pd.DataFrame:
+        """National totals for every year: ``Năm`` and metrics."""
+        li = self._level(level)
+        present = self._present(level).any(axis=0)
+        sums = np.nansum(self.values[:, present, li, :], axis=0, dtype="float64")
+        metrics = self.available_metrics(level)
+        df = pd.DataFrame(
+            sums[:, [self.metrics.index(m) for m in metrics]], columns=metrics
+        )
+        df.insert(0, "Năm", self.years[present])
+        return df
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _build_cube(version: str) -> EducationCube:
+    registry = get_registry()
+    return EducationCube.from_frames({key: registry.get(key) for key, _ in LEVELS})
+
+
+def get_cube() -> EducationCube:
+    """Shared cube for the current data version (rebuilt when any file changes)."""
+    return _build_cube(get_registry().version())
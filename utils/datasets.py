@@ -0,0 +1,206 @@
+"""
+Shared data-access layer for the GSO datasets bundled in ``data/``.
+
+Every page (Dashboard, AI Assistant, ...) reads the bundled tables through
+``get_registry()``, so the process holds exactly one parsed, typed copy of each
+table regardless of how many pages or sessions use it. Entries are keyed on the
+file path and invalidated when the file's mtime or size changes, so editing a
+CSV on disk is picked up on the next access without a restart.
+
+Tables are read from the typed Arrow snapshot built by ``python -m
+utils.snapshot`` when it is up to date, and parsed from CSV otherwise.
+
+Frames returned by the registry are shared objects: callers must copy them
+before mutating.
+"""
+
+import hashlib
+import os
+import threading
+from dataclasses import dataclass
+
+import pandas as pd
+import streamlit as st
+
+from utils import snapshot
+from utils.provinces import attach_coordinates
+from utils.schema import apply_schema
+
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"
+)
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    key: str
+    name: str
+    path: str
+    description: str
+    # Bảng theo tỉnh: các cột đếm được thu hẹp về int32/float32
+    by_province: bool = False
+
+
+CATALOG: tuple[DatasetSpec, ...] = (
+    DatasetSpec(
+        "tieu_hoc",
+        "Địa phương - Tiểu học",
+        "dia-phuong/tieu-hoc.csv",
+        "Dữ liệu chi tiết về giáo dục tiểu học theo từng địa phương (tỉnh/thành phố).",
+        by_province=True,
+    ),
+    DatasetSpec(
+        "thcs",
+        "Địa phương - Trung học cơ sở",
+        "dia-phuong/THCS.csv",
+        "Dữ liệu chi tiết về giáo dục trung học cơ sở theo từng địa phương (tỉnh/thành phố).",
+        by_province=True,
+    ),
+    DatasetSpec(
+        "thpt",
+        "Địa phương - Trung học phổ thông",
+        "dia-phuong/THPT.csv",
+        "Dữ liệu chi tiết về giáo dục trung học phổ thông theo từng địa phương (tỉnh/thành phố).",
+        by_province=True,
+    ),
+    DatasetSpec(
+        "mau_giao",
+        "Mẫu giáo - Địa phương",
+        "mau-giao/MG.csv",
+        "Dữ liệu chi tiết về giáo dục mẫu giáo theo từng địa phương (tỉnh/thành phố).",
+        by_province=True,
+    ),
+    DatasetSpec(
+        "mau_giao_tq",
+        "Mẫu giáo - Tổng quan Mẫu giáo",
+        "mau-giao/tong-quan-MG.csv",
+        "Dữ liệu tổng quan chung về tình hình giáo dục mẫu giáo trên cả nước.",
+    ),
+    DatasetSpec(
+        "chi_so",
+        "Tổng quan - Chỉ số phát triển",
+        "tong-quan/chi-so-phat-trien.csv",
+        "Các chỉ số phát triển giáo dục tổng hợp qua các năm.",
+    ),
+    DatasetSpec(
+        "tong_quan",
+        "Tổng quan - Tổng quan",
+        "tong-quan/tong-quan.csv",
+        "Dữ liệu tổng quan chung về giáo dục Việt Nam qua các năm (có thể bao gồm nhiều cấp học).",
+    ),
+    DatasetSpec(
+        "tong_quan_ts",
+        "Tổng quan - Tổng quan (tất cả)",
+        "tong-quan/tong-quan-all.csv",
+        "Bộ dữ liệu tổng hợp nhất, chứa thông tin tổng quan về tất cả các cấp học qua các năm.",
+    ),
+)
+
+
+def file_signature(path: str) -> tuple[int, int]:
+    """Returns (mtime_ns, size) for a file; raises FileNotFoundError if missing."""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def read_raw(path: str) -> pd.DataFrame:
+    """Parses one bundled CSV with pandas' default dtypes."""
+    df = pd.read_csv(path, encoding="utf-8-sig")
+    df.columns = df.columns.str.strip()
+    return df
+
+
+def read_dataset(path: str, by_province: bool = False) -> pd.DataFrame:
+    """
+    Parses one bundled CSV into a frame with the compact schema applied.
+    Province tables also get ``Lat``/``Lon`` from the province dimension.
+    """
+    df = apply_schema(read_raw(path), compact_counts=by_province)
+    if by_province:
+        df = attach_coordinates(df)
+    return df
+
+
+class DatasetRegistry:
+    """Loads catalog datasets on demand and keeps one resident copy of each."""
+
+    def __init__(self, data_dir: str = DATA_DIR, catalog=CATALOG):
+        self.data_dir = data_dir
+        self.specs = {spec.key: spec for spec in catalog}
+        self._frames: dict[str, tuple[tuple[int, int], pd.DataFrame]] = {}
+        self._overview: tuple[str, str] | None = None
+        self._lock = threading.Lock()
+
+    def _path(self, spec: DatasetSpec) -> str:
+        return os.path.join(self.data_dir, spec.path)
+
+    def _read(self, key: str, path: str) -> pd.DataFrame:
+        df = snapshot.read_table(self.data_dir, key, path)
+        if df is None:
+            df = read_dataset(path, by_province=self.specs[key].by_province)
+        return df
+
+    def get(self, key: str) -> pd.DataFrame:
+        """Returns the dataset, re-reading it only if the file changed on disk."""
+        spec = self.specs[key]
+        path = self._path(spec)
+        signature = file_signature(path)
+        with self._lock:
+            entry = self._frames.get(key)
+            if entry is None or entry[0] != signature:
+                entry = (signature, self._read(key, path))
+                self._frames[key] = entry
+            return entry[1]
+
+    def load_all(self) -> dict[str, pd.DataFrame]:
+        """All datasets keyed by their short key (e.g. ``"tieu_hoc"``)."""
+        return {key: self.get(key) for key in self.specs}
+
+    def load_all_by_name(self) -> dict[str, pd.DataFrame]:
+        """All datasets keyed by their display name (e.g. ``"Địa phương - Tiểu học"``)."""
+        return {spec.name: self.get(key) for key, spec in self.specs.items()}
+
+    def version(self) -> str:
+        """Short hash of every catalog file's signature; changes when any file does."""
+        digest = hashlib.sha1()
+        for spec in self.specs.values():
+            mtime_ns, size = file_signature(self._path(spec))
+            digest.update(f"{spec.path}:{mtime_ns}:{size};".encode())
+        return digest.hexdigest()[:12]
+
+    def overview(self) -> str:
+        """Text description (dtypes + first rows) of every dataset, built once per version."""
+        version = self.version()
+        if self._overview is not None and self._overview[0] == version:
+            return self._overview[1]
+
+        text = "Tổng quan về các bộ dữ liệu có sẵn:\n\n"
+        for key, spec in self.specs.items():
+            df = self.get(key)
+            # Get column types
+            try:
+                col_types_str = "\n".join(
+                    f"    '{col}': {dtype}" for col, dtype in df.dtypes.items()
+                )
+            except Exception:
+                col_types_str = "Không thể lấy kiểu dữ liệu cột."
+            # Get first 5 rows
+            try:
+                f5r = df.head().to_string()
+            except Exception:
+                f5r = "Không thể lấy 5 hàng đầu tiên."
+
+            text += f"- Tên: '{spec.name}'\n"
+            text += f"  Mô tả: {spec.description}\n"
+            text += f"  Cột và Kiểu dữ liệu:\n{col_types_str}\n"
+            text += f"  5 hàng đầu tiên (f5r):\n{f5r}\n\n"
+
+        with self._lock:
+            self._overview = (version, text)
+        return text
+
+
+@st.cache_resource(show_spinner=False)
+def get_registry() -> DatasetRegistry:
+    """Shared registry instance for the whole Streamlit process."""
+    return DatasetRegistry()
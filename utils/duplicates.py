@@ -0,0 +1,107 @@
+"""
+Hash-based duplicate detection.
+
+Every row (or its key columns, e.g. ``("Địa phương", "Năm")`` for the GSO
+panels) is hashed once with ``pd.util.hash_pandas_object``; equal hashes form
+a duplicate group. Counts, group ids, the first row of each group and the
+``duplicated()`` masks all come from that single pass, and the result is
+cached per data version so reruns do not hash again.
+
+Rows are compared by their 64-bit hash, so two different rows could in
+principle collide; for the frame sizes handled here this is negligible.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.uploads import SOURCE_COLUMN
+
+# Cột khoá thường dùng cho bảng GSO: mỗi tỉnh chỉ có một dòng cho mỗi năm
+PANEL_KEYS = ("Địa phương", "Năm")
+
+
+def default_keys(columns) -> list[str]:
+    """
+    ``PANEL_KEYS`` if ``columns`` has all of them (else [] to compare whole
+    rows), plus the source-file column of combined uploads, so the same
+    province-year from two files is not a duplicate.
+    """
+    if not all(key in columns for key in PANEL_KEYS):
+        return []
+    keys = list(PANEL_KEYS)
+    if SOURCE_COLUMN in columns:
+        keys.append(SOURCE_COLUMN)
+    return keys
+
+
+@dataclass(frozen=True)
+class DuplicateReport:
+    subset: tuple[str, ...] | None
+    # Nhóm của từng dòng (các dòng trùng nhau có cùng nhóm), theo thứ tự xuất hiện
+    group_ids: np.ndarray
+    # Số dòng của từng nhóm và vị trí dòng đầu tiên của nhóm
+    counts: np.ndarray
+    first: np.ndarray
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, subset=None) -> "DuplicateReport":
+        subset = tuple(subset) if subset else None
+        keys = df if subset is None else df[list(subset)]
+        hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+        group_ids, uniques = pd.factorize(hashes)
+        counts = np.bincount(group_ids, minlength=len(uniques))
+        first = np.empty(len(uniques), dtype=np.int64)
+        # Chỉ số lặp lại: giá trị gán sau cùng được giữ, nên duyệt ngược để lấy dòng đầu
+        first[group_ids[::-1]] = np.arange(len(df) - 1, -1, -1)
+        return cls(subset, group_ids, counts, first)
+
+    @property
+    def n_duplicates(self) -> int:
+        """Rows that repeat an earlier row (``df.duplicated().sum()``)."""
+        return int(len(self.group_ids) - len(self.counts))
+
+    @property
+    def n_groups(self) -> int:
+        """Groups with more than one row."""
+        return int((self.counts > 1).sum())
+
+    def duplicated(self, keep: str | bool = "first") -> np.ndarray:
+        """Same mask as ``df.duplicated(subset, keep=keep)``."""
+        if keep is False:
+            return self.counts[self.group_ids] > 1
+        positions = np.arange(len(self.group_ids))
+        if keep == "first":
+            return self.first[self.group_ids] != positions
+        last = np.empty(len(self.counts), dtype=np.int64)
+        last[self.group_ids] = positions
+        return last[self.group_ids] != positions
+
+    def representatives(self, df: pd.DataFrame) -> pd.DataFrame:
+        """First row of every duplicate group, with its group size."""
+        rows = self.first[self.counts > 1]
+        return df.iloc[rows].assign(**{"Số dòng": self.counts[self.group_ids[rows]]})
+
+    def groups(self, df: pd.DataFrame) -> pd.DataFrame:
+        """All rows that belong to a duplicate group, group by group."""
+        mask = self.duplicated(keep=False)
+        # Đánh số lại các nhóm trùng từ 1 theo thứ tự xuất hiện
+        numbers = np.zeros(len(self.counts), dtype=np.int64)
+        numbers[self.counts > 1] = np.arange(1, self.n_groups + 1)
+        rows = df[mask].assign(**{"Nhóm": numbers[self.group_ids[mask]]})
+        return rows.sort_values("Nhóm", kind="stable")
+
+
+@st.cache_resource(max_entries=16)
+def _cached_report(version: str, subset, _df: pd.DataFrame) -> DuplicateReport:
+    return DuplicateReport.from_frame(_df, subset)
+
+
+def find_duplicates(df: pd.DataFrame, version: str, subset=None) -> DuplicateReport:
+    """
+    Duplicate report for ``df`` on ``subset`` (all columns if empty), cached
+    on ``version``, which must change whenever the content of ``df`` does.
+    """
+    return _cached_report(version, tuple(subset) if subset else None, df)
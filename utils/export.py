@@ -0,0 +1,132 @@
+"""
+On-demand, chunked export of the Data Wrangling result.
+
+Nothing is serialized until the user asks for a file. Each format writes the
+frame ``CHUNK_ROWS`` rows at a time into one output buffer: gzip-compressed
+CSV, Parquet (one row group per chunk) or Excel (openpyxl write-only mode),
+so no full uncompressed CSV/Arrow/workbook copy of the frame is built next to
+it. The last prepared file is kept in the user's session state, as the
+``BytesIO`` it was written to, under its (pipeline version, format) key: reruns
+reuse it without serializing again, ``st.download_button`` reads that buffer
+directly so no second ``bytes`` copy of the file is made, and the previous
+file is dropped before a new one is written.
+
+``openpyxl`` is optional; without it the Excel format is reported as
+unavailable instead of failing.
+"""
+
+import gzip
+import importlib.util
+import io
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+
+CHUNK_ROWS = 100_000
+EXCEL_MAX_ROWS = 1_048_576
+SESSION_KEY = "wrangling_export"
+
+
+def _chunks(df: pd.DataFrame):
+    for start in range(0, len(df), CHUNK_ROWS):
+        yield start, df.iloc[start : start + CHUNK_ROWS]
+
+
+def write_csv_gzip(df: pd.DataFrame, buffer):
+    with gzip.GzipFile(fileobj=buffer, mode="wb") as out:
+        if df.empty:
+            out.write(df.to_csv(index=False).encode("utf-8"))
+        for start, chunk in _chunks(df):
+            out.write(chunk.to_csv(index=False, header=start == 0).encode("utf-8"))
+
+
+def write_parquet(df: pd.DataFrame, buffer):
+    # Lấy schema từ cả bảng để các khối có cột toàn giá trị thiếu vẫn cùng kiểu
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(buffer, schema, compression="snappy") as writer:
+        for _, chunk in _chunks(df):
+            writer.write_table(
+                pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            )
+
+
+def write_excel(df: pd.DataFrame, buffer):
+    from openpyxl import Workbook
+
+    if len(df) + 1 > EXCEL_MAX_ROWS:
+        raise ValueError(
+            f"Excel chỉ chứa tối đa {EXCEL_MAX_ROWS - 1} dòng dữ liệu, "
+            f"bảng hiện có {len(df)} dòng."
+        )
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Data")
+    sheet.append([str(column) for column in df.columns])
+    for _, chunk in _chunks(df):
+        # Giá trị thiếu thành ô trống, kiểu numpy thành kiểu Python
+        values = chunk.astype(object).where(chunk.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            sheet.append(row)
+    workbook.save(buffer)
+
+
+@dataclass(frozen=True)
+class ExportFormat:
+    label: str
+    extension: str
+    mime: str
+    write: Callable[[pd.DataFrame, io.BytesIO], None]
+    requires: str | None = None
+
+    def available(self) -> bool:
+        return (
+            self.requires is None or importlib.util.find_spec(self.requires) is not None
+        )
+
+
+FORMATS: dict[str, ExportFormat] = {
+    "csv.gz": ExportFormat(
+        "CSV (nén gzip)", "csv.gz", "application/gzip", write_csv_gzip
+    ),
+    "parquet": ExportFormat(
+        "Parquet", "parquet", "application/vnd.apache.parquet", write_parquet
+    ),
+    "xlsx": ExportFormat(
+        "Excel",
+        "xlsx",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        write_excel,
+        requires="openpyxl",
+    ),
+}
+
+
+def prepared_export(version: str, fmt: str) -> io.BytesIO | None:
+    """The file ``export`` prepared for ``(version, fmt)`` in this session, if any."""
+    prepared = st.session_state.get(SESSION_KEY)
+    if prepared is not None and prepared[0] == (version, fmt):
+        return prepared[1]
+    return None
+
+
+def export(df: pd.DataFrame, version: str, fmt: str) -> io.BytesIO:
+    """
+    ``df`` serialized as ``fmt`` (a key of ``FORMATS``) and kept in the
+    session under ``version``, which must change whenever ``df`` does.
+    """
+    data = prepared_export(version, fmt)
+    if data is not None:
+        return data
+    if not FORMATS[fmt].available():
+        raise ImportError(
+            f"Cần cài đặt '{FORMATS[fmt].requires}' để xuất {FORMATS[fmt].label}."
+        )
+    # Chỉ giữ tệp mới nhất của phiên này; bỏ tệp cũ trước khi ghi tệp mới
+    st.session_state.pop(SESSION_KEY, None)
+    buffer = io.BytesIO()
+    FORMATS[fmt].write(df, buffer)
+    st.session_state[SESSION_KEY] = ((version, fmt), buffer)
+    return buffer
@@ -0,0 +1,80 @@
+"""
+Process-wide cache of built Plotly figures.
+
+A dashboard figure depends only on its view parameters (section, data
+version, year, province, metric selection), so each distinct view is built
+once and served to every session. Entries are stored as figure JSON and
+evicted least recently used first once their total size exceeds a byte cap.
+"""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+
+import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class FigureCache:
+    """LRU of serialized figures keyed on view parameters, bounded in bytes."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, tuple[str, int]] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, build: Callable[[], go.Figure]) -> go.Figure:
+        """Returns the figure for ``key``, calling ``build()`` only on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if entry is None:
+            # Dựng ngoài khóa: hai phiên cùng trượt một khóa có thể dựng hai lần
+            text = build().to_json()
+            self._put(key, text)
+        else:
+            text = entry[0]
+        return pio.from_json(text)
+
+    def _put(self, key: Hashable, text: str):
+        size = len(text.encode("utf-8"))
+        with self._lock:
+            self.misses += 1
+            if size > self.max_bytes:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (text, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+@st.cache_resource(show_spinner=False)
+def get_figure_cache() -> FigureCache:
+    """Shared figure cache for the whole Streamlit process."""
+    return FigureCache()
@@ -0,0 +1,106 @@
+"""
+Single-pass filter engine for the EDA sidebar.
+
+``column_domains`` scans the frame once per data version and keeps, per
+column, what the sidebar needs: the min/max of numeric columns and the
+distinct values of text/categorical columns together with each row's code
+into that list. ``filter_mask`` then turns every slider range and
+multiselect choice into one boolean mask; a membership test is a lookup of
+the precomputed codes in a small allowed-values table. Filters left at their
+full range (or with every value selected) are skipped, so rows with missing
+values are only dropped by a filter the user actually narrowed.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+
+@dataclass(frozen=True)
+class ColumnDomain:
+    column: str
+    # Cột số: khoảng [low, high]; cột chữ / category: danh sách giá trị và mã từng dòng
+    low: float | None = None
+    high: float | None = None
+    values: tuple = ()
+    codes: np.ndarray | None = None
+
+    @property
+    def is_range(self) -> bool:
+        return self.codes is None
+
+
+def _numeric_values(series: pd.Series) -> np.ndarray:
+    if isinstance(series.dtype, np.dtype):
+        return series.to_numpy()
+    # Kiểu nullable (Int16, Float32...): giá trị thiếu thành NaN
+    return series.to_numpy(dtype="float64", na_value=np.nan)
+
+
+def _domain(series: pd.Series) -> ColumnDomain | None:
+    if pd.api.types.is_numeric_dtype(series):
+        values = _numeric_values(series)
+        if not len(values) or np.isnan(values.astype("float64", copy=False)).all():
+            return None
+        low, high = float(np.nanmin(values)), float(np.nanmax(values))
+        # Thanh trượt cần min < max
+        if not low < high:
+            return None
+        return ColumnDomain(series.name, low=low, high=high)
+    if pd.api.types.is_object_dtype(series) or isinstance(
+        series.dtype, pd.CategoricalDtype
+    ):
+        # Mã theo thứ tự xuất hiện, -1 cho giá trị thiếu
+        codes, uniques = pd.factorize(series)
+        return ColumnDomain(series.name, values=tuple(uniques), codes=codes)
+    return None
+
+
+def build_domains(df: pd.DataFrame) -> dict[str, ColumnDomain]:
+    """Sidebar domain of every filterable column, in column order."""
+    domains = {}
+    for col in df.columns:
+        domain = _domain(df[col])
+        if domain is not None:
+            domains[col] = domain
+    return domains
+
+
+@st.cache_resource(max_entries=8)
+def _cached_domains(version: str, _df: pd.DataFrame) -> dict[str, ColumnDomain]:
+    return build_domains(_df)
+
+
+def column_domains(df: pd.DataFrame, version: str) -> dict[str, ColumnDomain]:
+    """``build_domains(df)`` cached on ``version``, which changes with the data."""
+    return _cached_domains(version, df)
+
+
+def filter_mask(
+    df: pd.DataFrame, domains: dict[str, ColumnDomain], selections: dict
+) -> np.ndarray:
+    """
+    One boolean mask for every selection: ``(low, high)`` for range columns,
+    a list of allowed values for the others.
+    """
+    mask = np.ones(len(df), dtype=bool)
+    for col, selection in selections.items():
+        domain = domains[col]
+        if domain.is_range:
+            low, high = selection
+            if low <= domain.low and high >= domain.high:
+                continue
+            values = _numeric_values(df[col])
+            mask &= values >= low
+            mask &= values <= high
+        else:
+            if len(selection) == len(domain.values):
+                continue
+            # Bảng tra theo mã; phần tử cuối (mã -1: giá trị thiếu) luôn False
+            allowed = np.zeros(len(domain.values) + 1, dtype=bool)
+            positions = {value: i for i, value in enumerate(domain.values)}
+            allowed[[positions[v] for v in selection if v in positions]] = True
+            mask &= allowed[domain.codes]
+    return mask
@@ -0,0 +1,58 @@
+"""
+Year-over-year growth matrices for the dashboard heatmaps.
+
+Each matrix holds the % change of every indicator against the previous year
+(rows: years as strings, columns: short indicator names), rounded to one
+decimal. They are computed once per data version and shared by all sessions.
+"""
+
+import pandas as pd
+import streamlit as st
+
+from utils.datasets import get_registry
+
+OVERVIEW_COLUMNS = ("Trường", "Lớp", "Giáo viên", "Học sinh")
+
+# Cột trong tong-quan-MG.csv -> tên ngắn trên heatmap
+PRESCHOOL_COLUMNS = {
+    "Chỉ số phát triển (%) - Trường học": "Trường",
+    "Chỉ số phát triển (%) - Lớp học": "Lớp",
+    "Chỉ số phát triển (%) - Giáo viên": "Giáo viên",
+    "Chỉ số phát triển (%) - Học sinh": "Học sinh",
+    "Chỉ số phát triển (%) - Số học sinh bình quân một giáo viên": "HS/GV",
+    "Chỉ số phát triển (%) - Số học sinh bình quân một lớp học": "HS/Lớp",
+}
+
+
+def pct_change_matrix(df: pd.DataFrame, year_column: str, columns) -> pd.DataFrame:
+    """% change vs the previous year for ``columns``; the first year is dropped."""
+    table = df.sort_values(year_column).set_index(year_column)[list(columns)]
+    matrix = (table.astype("float64").pct_change() * 100).round(1).iloc[1:]
+    matrix.index = matrix.index.astype(str)
+    return matrix
+
+
+def overview_growth(chi_so: pd.DataFrame) -> pd.DataFrame:
+    """Tổng quan: all levels combined (``Cấp học == "Tổng số"``)."""
+    total = chi_so[chi_so["Cấp học"] == "Tổng số"]
+    return pct_change_matrix(total, "Năm học", OVERVIEW_COLUMNS)
+
+
+def preschool_growth(mau_giao_tq: pd.DataFrame) -> pd.DataFrame:
+    """Mẫu giáo: development indices, skipping years with a missing value."""
+    matrix = pct_change_matrix(mau_giao_tq, "Năm", PRESCHOOL_COLUMNS)
+    return matrix.rename(columns=PRESCHOOL_COLUMNS).dropna()
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _build_growth(version: str) -> dict[str, pd.DataFrame]:
+    registry = get_registry()
+    return {
+        "tong_quan": overview_growth(registry.get("chi_so")),
+        "mau_giao": preschool_growth(registry.get("mau_giao_tq")),
+    }
+
+
+def get_growth_matrices() -> dict[str, pd.DataFrame]:
+    """``{"tong_quan": ..., "mau_giao": ...}`` for the current data version."""
+    return _build_growth(get_registry().version())
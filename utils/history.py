@@ -0,0 +1,185 @@
+"""
+Copy-on-write undo/redo history of DataFrame snapshots.
+
+A snapshot is the row index plus one Series per column. When a snapshot is
+pushed with the set of columns the step changed and the rows are unchanged,
+every other column is the *same* Series object as in the previous snapshot,
+so a fill or type conversion of one column only stores that column. Row
+operations (drop missing rows, filters, dropping duplicates) store every
+column again.
+
+The bytes of all distinct column buffers are tracked; past ``max_bytes`` the
+oldest snapshots are dropped (the base frame and the current one are always
+kept). A dropped snapshot reads as ``None`` and is recomputed by the caller.
+"""
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+import pandas as pd
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def _buffer(series: pd.Series):
+    """(id, bytes) of the memory backing ``series``; views of one block share an id."""
+    if series.dtype == object or not isinstance(
+        series.array, pd.arrays.NumpyExtensionArray
+    ):
+        return id(series.array), int(series.memory_usage(deep=True, index=False))
+    values = series.to_numpy()
+    base = values if values.base is None else values.base
+    return id(base), int(base.nbytes)
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    index: pd.Index
+    columns: dict[str, pd.Series]
+    # Cột -> (id, số byte) của vùng nhớ bên dưới, tính một lần khi chụp
+    buffers: dict[str, tuple[int, int]]
+
+    @classmethod
+    def capture(
+        cls,
+        df: pd.DataFrame,
+        previous: "Snapshot | None" = None,
+        changed: Iterable[str] | None = None,
+    ) -> "Snapshot":
+        """
+        Snapshot of ``df``. If ``changed`` is given and the rows match
+        ``previous``, columns outside ``changed`` are taken from ``previous``.
+        """
+        shared = {}
+        if (
+            previous is not None
+            and changed is not None
+            and df.index.equals(previous.index)
+        ):
+            changed = set(changed)
+            shared = {
+                column: series
+                for column, series in previous.columns.items()
+                if column not in changed
+            }
+            index = previous.index
+        else:
+            index = df.index
+        columns, buffers = {}, {}
+        for column in df.columns:
+            series = shared.get(column)
+            if series is not None and series.dtype == df[column].dtype:
+                buffers[column] = previous.buffers[column]
+            else:
+                series = df[column]
+                buffers[column] = _buffer(series)
+            columns[column] = series
+        return cls(index, columns, buffers)
+
+    def frame(self) -> pd.DataFrame:
+        """DataFrame over the stored columns, without copying them."""
+        return pd.DataFrame(self.columns, index=self.index, copy=False)
+
+
+class History:
+    """
+    Snapshots ``[base, after step 1, after step 2, ...]`` with a current
+    position; entries after the position are the redo stack.
+    """
+
+    def __init__(self, base: pd.DataFrame, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: list[Snapshot | None] = [Snapshot.capture(base)]
+        self.position = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, index: int) -> pd.DataFrame | None:
+        """Frame of entry ``index``, or None if it was dropped or never computed."""
+        entry = self._entries[index]
+        return None if entry is None else entry.frame()
+
+    def current(self) -> pd.DataFrame | None:
+        return self.get(self.position)
+
+    def _nearest(self, index: int) -> Snapshot | None:
+        # Ảnh chụp ngay trước (nếu còn giữ) để dùng chung các cột không đổi
+        return self._entries[index - 1] if index > 0 else None
+
+    def set(self, index: int, df: pd.DataFrame, changed: Iterable[str] | None = None):
+        """Stores ``df`` as entry ``index`` (e.g. after recomputing a dropped one)."""
+        self._entries[index] = Snapshot.capture(df, self._nearest(index), changed)
+        self._enforce_cap()
+
+    def push(self, df: pd.DataFrame, changed: Iterable[str] | None = None):
+        """Adds ``df`` after the current entry, discarding the redo stack."""
+        self.drop_redo()
+        self._entries.append(None)
+        self.position += 1
+        self.set(self.position, df, changed)
+
+    def can_undo(self) -> bool:
+        return self.position > 0
+
+    def can_redo(self) -> bool:
+        return self.position < len(self._entries) - 1
+
+    def undo(self) -> bool:
+        if not self.can_undo():
+            return False
+        self.position -= 1
+        return True
+
+    def redo(self) -> bool:
+        if not self.can_redo():
+            return False
+        self.position += 1
+        return True
+
+    def drop_redo(self):
+        del self._entries[self.position + 1 :]
+
+    def truncate(self, length: int):
+        """Keeps the first ``length`` entries (at least the base)."""
+        del self._entries[max(length, 1) :]
+        self.position = min(self.position, len(self._entries) - 1)
+
+    def delete(self, index: int):
+        """Removes entry ``index`` (> 0) and drops every later snapshot."""
+        del self._entries[index]
+        if self.position >= index:
+            self.position -= 1
+        self.invalidate(index)
+
+    def invalidate(self, start: int):
+        """Drops the snapshots from ``start`` on; they read as None until set again."""
+        for i in range(max(start, 1), len(self._entries)):
+            self._entries[i] = None
+
+    def nbytes(self) -> int:
+        """Bytes of the distinct column buffers held by all snapshots."""
+        buffers = {}
+        for entry in self._entries:
+            if entry is not None:
+                buffers.update(entry.buffers.values())
+        return sum(buffers.values())
+
+    def _enforce_cap(self):
+        # Bỏ ảnh chụp cũ nhất trước; luôn giữ dữ liệu gốc và vị trí hiện tại
+        for i in range(1, len(self._entries)):
+            if self.nbytes() <= self.max_bytes:
+                return
+            if i != self.position and self._entries[i] is not None:
+                self._entries[i] = None
+                self.dropped += 1
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "kept": sum(entry is not None for entry in self._entries),
+            "position": self.position,
+            "bytes": self.nbytes(),
+            "dropped": self.dropped,
+        }
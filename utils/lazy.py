@@ -0,0 +1,176 @@
+"""
+Lazy query plans for wrangling recipes.
+
+A ``LazyFrame`` records pipeline steps (the same ``Step``/``OPS`` registry as
+``utils.pipeline``) without running them. ``optimize()`` rewrites the plan
+before it runs:
+
+* row filters are pushed ahead of type conversions and fills on other
+  columns and ahead of ``dropna``/``drop_duplicates``, so the later steps
+  see fewer rows;
+* consecutive filters are merged into one step that builds a single mask;
+* columns that no later step uses are dropped up front, and fills/type
+  conversions of dropped columns are removed.
+
+``collect_csv()`` additionally passes the leading projection to ``read_csv``
+as ``usecols`` and, with ``chunksize``, runs the row-local prefix of the plan
+chunk by chunk so the full extract is never held in memory at once.
+"""
+
+import pandas as pd
+
+from utils.pipeline import Step
+
+# Mỗi dòng đầu ra chỉ phụ thuộc vào chính dòng đó ở đầu vào: chạy được theo từng khối
+ROW_LOCAL = frozenset({"filter", "select", "fillna", "astype", "dropna"})
+
+
+def _filter_columns(step: Step) -> set[str]:
+    return {column for column, _, _ in step.kwargs["conditions"]}
+
+
+def _can_swap(previous: Step, filter_step: Step) -> bool:
+    """True if ``filter_step`` gives the same result when run before ``previous``."""
+    if previous.op in ("astype", "fillna"):
+        return previous.kwargs["column"] not in _filter_columns(filter_step)
+    # dropna / lọc chỉ xét từng dòng; các dòng trùng nhau luôn cùng qua hoặc cùng bị lọc
+    # (trùng theo một số cột khoá thì không: dòng được giữ lại có thể bị lọc)
+    if previous.op == "drop_duplicates":
+        return not previous.kwargs.get("subset")
+    return previous.op == "dropna"
+
+
+def _push_filters(steps: list[Step]) -> list[Step]:
+    steps = list(steps)
+    moved = True
+    while moved:
+        moved = False
+        for i in range(1, len(steps)):
+            if steps[i].op == "filter" and _can_swap(steps[i - 1], steps[i]):
+                steps[i - 1], steps[i] = steps[i], steps[i - 1]
+                moved = True
+    return steps
+
+
+def _merge_filters(steps: list[Step]) -> list[Step]:
+    merged: list[Step] = []
+    for step in steps:
+        if step.op == "filter" and merged and merged[-1].op == "filter":
+            conditions = merged[-1].kwargs["conditions"] + step.kwargs["conditions"]
+            merged[-1] = Step.make("filter", conditions=conditions)
+        else:
+            merged.append(step)
+    return merged
+
+
+def _prune_columns(steps: list[Step]) -> list[Step]:
+    """
+    Walks the plan backwards tracking the columns still needed (None: all of
+    them). Fills/conversions of unneeded columns are dropped, and if the plan
+    does not need every source column a projection is inserted first.
+    """
+    needed: set[str] | None = None
+    kept: list[Step] = []
+    for step in reversed(steps):
+        if step.op == "select":
+            # Mọi cột của phép chọn phải có sẵn ở đầu vào của nó, kể cả khi
+            # các bước sau chỉ dùng một phần
+            needed = set(step.kwargs["columns"])
+        elif step.op == "filter":
+            if needed is not None:
+                needed |= _filter_columns(step)
+        elif step.op in ("astype", "fillna"):
+            if needed is not None and step.kwargs["column"] not in needed:
+                continue
+        else:
+            # dropna / drop_duplicates xét mọi cột
+            needed = None
+        kept.append(step)
+    kept.reverse()
+    if needed is not None:
+        projection = Step.make("select", columns=sorted(needed))
+        if not kept or kept[0] != projection:
+            kept.insert(0, projection)
+    return kept
+
+
+def optimize(steps) -> list[Step]:
+    """Optimized equivalent of ``steps``."""
+    return _prune_columns(_merge_filters(_push_filters(steps)))
+
+
+def _run(steps, df: pd.DataFrame) -> pd.DataFrame:
+    for step in steps:
+        df = step.apply(df)
+    return df
+
+
+class LazyFrame:
+    """An immutable plan of steps over a DataFrame or a CSV path."""
+
+    def __init__(self, source, steps=()):
+        self.source = source
+        self.steps: tuple[Step, ...] = tuple(steps)
+
+    def then(self, step: Step) -> "LazyFrame":
+        return LazyFrame(self.source, self.steps + (step,))
+
+    def filter(self, column: str, op: str, value=None) -> "LazyFrame":
+        return self.then(Step.make("filter", conditions=[(column, op, value)]))
+
+    def select(self, columns) -> "LazyFrame":
+        return self.then(Step.make("select", columns=list(columns)))
+
+    def dropna(self) -> "LazyFrame":
+        return self.then(Step.make("dropna"))
+
+    def fillna(self, column: str, value) -> "LazyFrame":
+        return self.then(Step.make("fillna", column=column, value=value))
+
+    def drop_duplicates(self) -> "LazyFrame":
+        return self.then(Step.make("drop_duplicates"))
+
+    def astype(self, column: str, dtype: str) -> "LazyFrame":
+        return self.then(Step.make("astype", column=column, dtype=dtype))
+
+    def optimized(self) -> "LazyFrame":
+        return LazyFrame(self.source, optimize(self.steps))
+
+    def explain(self) -> str:
+        """Original and optimized plan, one step per line."""
+        lines = ["Kế hoạch gốc:"]
+        lines += [f"  {i + 1}. {step.describe()}" for i, step in enumerate(self.steps)]
+        lines.append("Kế hoạch đã tối ưu:")
+        lines += [
+            f"  {i + 1}. {step.describe()}"
+            for i, step in enumerate(optimize(self.steps))
+        ]
+        return "\n".join(lines)
+
+    def collect(self, optimize_plan: bool = True, **read_csv_kwargs) -> pd.DataFrame:
+        """Runs the (optimized) plan; a path source is read with ``collect_csv``."""
+        steps = optimize(self.steps) if optimize_plan else self.steps
+        if isinstance(self.source, pd.DataFrame):
+            return _run(steps, self.source)
+        return collect_csv(self.source, steps, **read_csv_kwargs)
+
+
+def collect_csv(path, steps, chunksize: int | None = None, **read_csv_kwargs):
+    """
+    Runs ``steps`` over a CSV file. A leading projection becomes ``usecols``;
+    with ``chunksize`` the row-local prefix of the plan runs per chunk.
+    """
+    steps = list(steps)
+    if steps and steps[0].op == "select":
+        read_csv_kwargs["usecols"] = list(steps[0].kwargs["columns"])
+    if chunksize is None:
+        return _run(steps, pd.read_csv(path, **read_csv_kwargs))
+
+    split = 0
+    while split < len(steps) and steps[split].op in ROW_LOCAL:
+        split += 1
+    chunks = [
+        _run(steps[:split], chunk)
+        for chunk in pd.read_csv(path, chunksize=chunksize, **read_csv_kwargs)
+    ]
+    return _run(steps[split:], pd.concat(chunks))
@@ -0,0 +1,175 @@
+"""
+Vectorized outlier scan over every numeric column of a frame.
+
+``OutlierScan.of`` stacks the numeric columns into a float matrix (a block of
+columns at a time, to bound memory), sorts it once along the rows and reads
+quartiles, medians and MADs for all columns together. Each method keeps two
+parameters and an outlier count per column:
+
+* ``iqr``: outside ``[Q1 - 1.5 IQR, Q3 + 1.5 IQR]``, as in the profiles;
+* ``zscore``: ``|x - mean| / std > 3``;
+* ``mad``: modified z-score ``0.6745 |x - median| / MAD > 3.5``; when more
+  than half of a column is one value (MAD = 0) the scale falls back to the
+  mean absolute deviation from the median, ``|x - median| / (1.253314
+  MeanAD) > 3.5``, and a column with no spread at all has no MAD outliers.
+
+``outlier_scan`` caches the scan per (data version, filter state). Only those
+per-column numbers are cached, not per-row masks: the overview reads the
+counts, and the mask of the one column on display is one vectorized
+comparison against its cached parameters.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+METHODS = {
+    "iqr": "IQR (1.5 × IQR)",
+    "zscore": "Z-score (|z| > 3)",
+    "mad": "MAD (|z cải tiến| > 3.5)",
+}
+IQR_FACTOR = 1.5
+Z_THRESHOLD = 3.0
+MAD_THRESHOLD = 3.5
+# Hằng số đưa MAD về cùng thang với độ lệch chuẩn của phân phối chuẩn
+MAD_SCALE = 0.6745
+# Hằng số tương ứng cho độ lệch tuyệt đối trung bình, dùng khi MAD = 0
+MEAN_AD_SCALE = 1.253314
+# Kích thước tối đa của một khối ma trận cột số
+BLOCK_BYTES = 64 * 1024 * 1024
+
+
+def _is_numeric(series: pd.Series) -> bool:
+    # Giống hồ sơ cột: cột bool không phải cột số
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(
+        series
+    )
+
+
+def _sorted_quantiles(ordered: np.ndarray, counts: np.ndarray, q: float):
+    """Linear-interpolated ``q`` quantile of each column of a NaN-last sorted matrix."""
+    position = np.maximum(counts - 1, 0) * q
+    below = np.floor(position).astype(np.int64)
+    above = np.ceil(position).astype(np.int64)
+    columns = np.arange(ordered.shape[1])
+    low, high = ordered[below, columns], ordered[above, columns]
+    result = low + (position - below) * (high - low)
+    return np.where(counts > 0, result, np.nan)
+
+
+def _flag(values: np.ndarray, method: str, params: np.ndarray) -> np.ndarray:
+    """
+    Outlier mask of ``values`` (rows x columns, or one column) from the
+    per-column ``params`` of ``method``; missing values are never outliers.
+    """
+    first, second = params[..., 0], params[..., 1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if method == "iqr":
+            return (values < first) | (values > second)
+        if method == "zscore":
+            return np.abs(values - first) / second > Z_THRESHOLD
+        return np.abs(values - first) / second > MAD_THRESHOLD
+
+
+def _scan_block(values: np.ndarray) -> dict[str, np.ndarray]:
+    """Per-column parameters of every method for one (row x column) block."""
+    present = ~np.isnan(values)
+    counts = present.sum(axis=0)
+    ordered = np.sort(values, axis=0)
+    q1 = _sorted_quantiles(ordered, counts, 0.25)
+    median = _sorted_quantiles(ordered, counts, 0.5)
+    q3 = _sorted_quantiles(ordered, counts, 0.75)
+    del ordered
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.nansum(values, axis=0) / counts
+        std = np.sqrt(np.nansum((values - mean) ** 2, axis=0) / (counts - 1))
+        distance = np.abs(values - median)
+        mad = _sorted_quantiles(np.sort(distance, axis=0), counts, 0.5)
+        mean_ad = np.nansum(distance, axis=0) / counts
+        del distance
+        # Thang đo cùng đơn vị với độ lệch chuẩn; NaN (không outlier) nếu cột không phân tán
+        scale = np.where(mad > 0, mad / MAD_SCALE, MEAN_AD_SCALE * mean_ad)
+        scale = np.where(scale > 0, scale, np.nan)
+
+    iqr = q3 - q1
+    # iqr: (cận dưới, cận trên); zscore: (mean, std); mad: (median, thang đo MAD)
+    return {
+        "iqr": np.column_stack([q1 - IQR_FACTOR * iqr, q3 + IQR_FACTOR * iqr]),
+        "zscore": np.column_stack([mean, std]),
+        "mad": np.column_stack([median, scale]),
+    }
+
+
+def _column_values(df: pd.DataFrame, columns) -> np.ndarray:
+    return np.column_stack(
+        [df[col].to_numpy(dtype="float64", na_value=np.nan) for col in columns]
+    )
+
+
+@dataclass(frozen=True)
+class OutlierScan:
+    columns: tuple
+    rows: int
+    # Phương pháp -> tham số (cột x 2) và số outlier của từng cột; không giữ mask
+    # theo dòng, mask của một cột được tính lại khi cần
+    params: dict[str, np.ndarray]
+    counts: dict[str, np.ndarray]
+
+    @classmethod
+    def of(cls, df: pd.DataFrame) -> "OutlierScan":
+        columns = tuple(col for col in df.columns if _is_numeric(df[col]))
+        rows = len(df)
+        params = {m: np.full((len(columns), 2), np.nan) for m in METHODS}
+        counts = {m: np.zeros(len(columns), dtype=np.int64) for m in METHODS}
+        step = max(1, BLOCK_BYTES // max(rows * 8, 1))
+        for start in range(0, len(columns) if rows else 0, step):
+            block = columns[start : start + step]
+            values = _column_values(df, block)
+            block_params = _scan_block(values)
+            for method in METHODS:
+                params[method][start : start + len(block)] = block_params[method]
+                flags = _flag(values, method, block_params[method])
+                counts[method][start : start + len(block)] = flags.sum(axis=0)
+        return cls(columns, rows, params, counts)
+
+    def mask(self, df: pd.DataFrame, column, method: str = "iqr") -> np.ndarray:
+        """Row mask of the outliers of ``column`` in ``df``, the scanned frame."""
+        values = _column_values(df, [column])[:, 0]
+        return _flag(values, method, self.params[method][self.columns.index(column)])
+
+    def bounds(self, method: str) -> np.ndarray:
+        """(column x 2) lower/upper outlier bounds of ``method``."""
+        first, second = self.params[method][:, 0], self.params[method][:, 1]
+        if method == "iqr":
+            return self.params[method]
+        spread = second * (Z_THRESHOLD if method == "zscore" else MAD_THRESHOLD)
+        return np.column_stack([first - spread, first + spread])
+
+    def overview(self) -> pd.DataFrame:
+        """Outlier counts of every numeric column under each method, plus the IQR bounds."""
+        table = pd.DataFrame(
+            {METHODS[m]: self.counts[m] for m in METHODS},
+            index=pd.Index(self.columns, name="Cột"),
+        )
+        share = table[METHODS["iqr"]] / max(self.rows, 1) * 100
+        table["Tỉ lệ IQR (%)"] = share.round(2)
+        bounds = self.bounds("iqr")
+        table["Cận dưới IQR"] = bounds[:, 0]
+        table["Cận trên IQR"] = bounds[:, 1]
+        return table
+
+
+@st.cache_resource(max_entries=8)
+def _cached_scan(version: str, filter_key, _df: pd.DataFrame) -> OutlierScan:
+    return OutlierScan.of(_df)
+
+
+def outlier_scan(df: pd.DataFrame, version: str, filter_key=None) -> OutlierScan:
+    """
+    ``OutlierScan.of(df)`` cached on ``version`` (changes with the data) and
+    ``filter_key`` (changes with the rows kept by the filters).
+    """
+    return _cached_scan(version, filter_key, df)
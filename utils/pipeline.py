@@ -0,0 +1,303 @@
+"""
+Recorded, replayable transformation pipeline for the Data Wrangling page.
+
+The page records each edit (drop missing rows, fill missing values, drop
+duplicates, change a column's type; row filters and column selection are
+also available to recipes) as a ``Step`` on a ``Pipeline`` kept in
+session state instead of mutating a local frame that the next rerun throws
+away. Every step's output is kept in a copy-on-write undo/redo history
+(``utils.history``); editing or removing a step only recomputes the steps
+after it, and the final result is the cached tail.
+"""
+
+import hashlib
+import json
+import operator
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.history import DEFAULT_MAX_BYTES, History
+
+SESSION_KEY = "wrangling_pipeline"
+
+
+def _dropna(df: pd.DataFrame) -> pd.DataFrame:
+    return df.dropna()
+
+
+def _fillna(df: pd.DataFrame, column: str, value) -> pd.DataFrame:
+    series = df[column]
+    if (
+        isinstance(series.dtype, pd.CategoricalDtype)
+        and value not in series.cat.categories
+    ):
+        # Cột category (tự nhận diện khi tải tệp) cần thêm giá trị mới vào danh mục trước
+        series = series.cat.add_categories([value])
+    return df.assign(**{column: series.fillna(value)})
+
+
+def _drop_duplicates(df: pd.DataFrame, subset=None) -> pd.DataFrame:
+    return df.drop_duplicates(subset=list(subset) if subset else None)
+
+
+ASTYPE_TARGETS = {"int": int, "float": float, "str": str}
+
+
+def _astype(df: pd.DataFrame, column: str, dtype: str) -> pd.DataFrame:
+    return df.assign(**{column: df[column].astype(ASTYPE_TARGETS[dtype])})
+
+
+FILTER_OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+def condition_mask(df: pd.DataFrame, column: str, op: str, value) -> np.ndarray:
+    """Boolean mask for one ``(column, op, value)`` row condition."""
+    series = df[column]
+    if op == "isin":
+        return series.isin(value).to_numpy()
+    if op == "between":
+        return series.between(*value).to_numpy()
+    if op == "notna":
+        return series.notna().to_numpy()
+    # So sánh với giá trị thiếu (pd.NA) được coi là không thỏa
+    return FILTER_OPERATORS[op](series, value).fillna(False).to_numpy(dtype=bool)
+
+
+def _filter(df: pd.DataFrame, conditions) -> pd.DataFrame:
+    """Keeps rows matching every ``(column, op, value)`` condition, in one pass."""
+    mask = np.ones(len(df), dtype=bool)
+    for column, op, value in conditions:
+        mask &= condition_mask(df, column, op, value)
+    return df[mask]
+
+
+def _select(df: pd.DataFrame, columns) -> pd.DataFrame:
+    return df[list(columns)]
+
+
+# Tên thao tác -> (hàm, mô tả hiển thị)
+OPS: dict[str, tuple[Callable[..., pd.DataFrame], str]] = {
+    "dropna": (_dropna, "Xoá dòng thiếu"),
+    "fillna": (_fillna, "Điền giá trị thiếu"),
+    "drop_duplicates": (_drop_duplicates, "Xoá dòng trùng lặp"),
+    "astype": (_astype, "Chuyển kiểu dữ liệu"),
+    "filter": (_filter, "Lọc dòng"),
+    "select": (_select, "Chọn cột"),
+}
+
+
+def _freeze(value):
+    """Lists (e.g. ``isin`` values, column lists) become tuples so steps are hashable."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+@dataclass(frozen=True)
+class Step:
+    op: str
+    params: tuple[tuple[str, object], ...] = ()
+
+    @classmethod
+    def make(cls, op: str, **params) -> "Step":
+        if op not in OPS:
+            raise ValueError(f"Unknown pipeline operation: {op!r}")
+        return cls(op, tuple(sorted((k, _freeze(v)) for k, v in params.items())))
+
+    @property
+    def kwargs(self) -> dict:
+        return dict(self.params)
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        return OPS[self.op][0](df, **self.kwargs)
+
+    def describe(self) -> str:
+        label = OPS[self.op][1]
+        if not self.params:
+            return label
+        args = ", ".join(f"{key}={value!r}" for key, value in self.params)
+        return f"{label} ({args})"
+
+
+def _json_default(value):
+    # Giá trị điền tính từ dữ liệu có thể là số numpy
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot save {type(value).__name__} in a recipe")
+
+
+def fill_statistic(series: pd.Series, how: str):
+    """
+    Mean (``how="mean"``) or mode of ``series`` as a plain Python value for a
+    fillna step. The mean is taken in float64 so compact float32/int16
+    columns do not leak their storage precision into the step or the recipe.
+    """
+    if how == "mean":
+        value = series.astype("float64").mean()
+    else:
+        value = series.mode().iloc[0]
+        if isinstance(value, np.floating):
+            # Số ngắn nhất biểu diễn đúng giá trị đã lưu (float32: 1977.9757)
+            value = float(str(value))
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def recipe_to_json(steps) -> str:
+    """Saved recipe: a JSON list of ``{"op": ..., "params": {...}}``."""
+    recipe = [{"op": step.op, "params": step.kwargs} for step in steps]
+    return json.dumps(recipe, ensure_ascii=False, indent=2, default=_json_default)
+
+
+def recipe_from_json(text: str) -> list[Step]:
+    return [
+        Step.make(item["op"], **item.get("params", {})) for item in json.loads(text)
+    ]
+
+
+def changed_columns(step: Step) -> set[str] | None:
+    """Columns whose values ``step`` may change, or None if it changes the rows."""
+    if step.op in ("fillna", "astype"):
+        return {step.kwargs["column"]}
+    if step.op == "select":
+        return set()
+    return None
+
+
+class _StepFailed(Exception):
+    def __init__(self, index: int, error: Exception):
+        super().__init__(index, error)
+        self.index = index
+        self.error = error
+
+
+class Pipeline:
+    """
+    Steps applied in order to a source frame. Each step's output is kept as a
+    snapshot in a ``History`` (entry ``i + 1`` is the frame after
+    ``steps[i]``) that shares unchanged columns between steps, so undo/redo
+    only move a position. Snapshots dropped by the memory cap, or after an
+    edit to an earlier step, are recomputed from the nearest kept one.
+    """
+
+    def __init__(
+        self, source_key: str, source: pd.DataFrame, max_bytes: int = DEFAULT_MAX_BYTES
+    ):
+        self.source_key = source_key
+        self.source = source
+        self.history = History(source, max_bytes)
+        # Mọi bước đã ghi; các bước sau vị trí hiện tại là các bước có thể làm lại
+        self._steps: list[Step] = []
+        # (chỉ số bước, lỗi) của bước đầu tiên không chạy lại được
+        self.error: tuple[int, Exception] | None = None
+
+    @property
+    def steps(self) -> list[Step]:
+        """Steps currently applied (undone steps excluded)."""
+        return self._steps[: self.history.position]
+
+    @property
+    def redo_steps(self) -> list[Step]:
+        return self._steps[self.history.position :]
+
+    def version(self) -> str:
+        """Short hash of the source and the applied steps; changes with any edit."""
+        digest = hashlib.sha1(self.source_key.encode())
+        for step in self.steps:
+            digest.update(repr(step).encode())
+        return digest.hexdigest()[:12]
+
+    def output(self, index: int) -> pd.DataFrame:
+        """Frame after ``steps[index]`` (``-1``: the source), computing only missing steps."""
+        if index < 0:
+            return self.source
+        start = index + 1
+        df = self.history.get(start)
+        while df is None:
+            start -= 1
+            df = self.history.get(start) if start > 0 else self.source
+        for i in range(start, index + 1):
+            try:
+                df = self._steps[i].apply(df)
+            except Exception as e:
+                raise _StepFailed(i, e) from e
+            self.history.set(i + 1, df, changed_columns(self._steps[i]))
+        return df
+
+    def result(self) -> pd.DataFrame:
+        """
+        Output of the last applied step. If a step fails on replay (e.g. after
+        an earlier step was removed), returns the output just before it and
+        sets ``error``.
+        """
+        self.error = None
+        try:
+            return self.output(self.history.position - 1)
+        except _StepFailed as failed:
+            self.error = (failed.index, failed.error)
+            return self.output(failed.index - 1)
+
+    def _truncate(self, length: int):
+        del self._steps[length:]
+        self.history.truncate(length + 1)
+        self.error = None
+
+    def append(self, step: Step) -> pd.DataFrame:
+        """Runs ``step`` on the current result and records it; raises if it fails."""
+        current = self.result()
+        out = step.apply(current)
+        if self.error is not None:
+            # Bước lỗi đang chặn phía sau: bỏ các bước từ đó trước khi thêm bước mới
+            self._truncate(self.error[0])
+        del self._steps[self.history.position :]
+        self._steps.append(step)
+        self.history.push(out, changed_columns(step))
+        return out
+
+    def _edit(self, index: int):
+        # Sửa một bước làm mất các bước có thể làm lại và mọi kết quả sau nó
+        self._truncate(self.history.position)
+        self.history.invalidate(index + 1)
+
+    def remove(self, index: int):
+        self._edit(index)
+        del self._steps[index]
+        self.history.delete(index + 1)
+
+    def replace(self, index: int, step: Step):
+        self._edit(index)
+        self._steps[index] = step
+
+    def undo(self) -> bool:
+        """Steps back one edit; the undone step stays available to ``redo``."""
+        self.error = None
+        return self.history.undo()
+
+    def redo(self) -> bool:
+        self.error = None
+        return self.history.redo()
+
+    def reset(self):
+        self._truncate(0)
+
+
+def session_pipeline(source_key: str, load: Callable[[], pd.DataFrame]) -> Pipeline:
+    """
+    The session's pipeline for the upload ``source_key``; a new upload starts
+    an empty pipeline. ``load`` is only called when a new pipeline is created.
+    """
+    pipeline = st.session_state.get(SESSION_KEY)
+    if pipeline is None or pipeline.source_key != source_key:
+        pipeline = Pipeline(source_key, load())
+        st.session_state[SESSION_KEY] = pipeline
+    return pipeline
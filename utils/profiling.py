@@ -0,0 +1,282 @@
+"""
+Column profiles for the EDA page, computed on a background thread.
+
+``profile_column`` derives everything the page shows for a column from one
+pass over its values: counts, quartiles, moments (mean, std, skew and
+kurtosis with pandas' bias corrections) and IQR outlier bounds for numeric
+columns, value counts for the others; the outlier rows themselves come from
+the all-column scan in ``utils.outliers``. Numeric profiles also carry the
+server-side histogram and box aggregates drawn by ``utils.charts``. A
+``ProfileJob`` profiles every column of a frame on a worker thread and
+reports progress; the process-wide ``ProfileStore`` keeps recent jobs keyed
+on (data version, filter state), so a rerun, a tab switch or picking another
+column reuses finished profiles. ``ready_profiles`` never blocks the script:
+the page renders the columns profiled so far and a polling fragment reruns
+it when the job is done.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.charts import BoxSummary, Histogram
+from utils.streaming import Moments, moment_stats
+
+QUARTILES = (0.25, 0.5, 0.75)
+# Khoảng IQR mở rộng để xác định outlier
+IQR_FACTOR = 1.5
+# Chu kỳ (giây) kiểm tra tiến độ luồng nền khi trang đang hiển thị kết quả dở dang
+POLL_SECONDS = 0.5
+
+
+@dataclass
+class ColumnProfile:
+    name: str
+    dtype: object
+    rows: int
+    count: int
+    unique: int
+    numeric: bool
+    mean: float = np.nan
+    std: float = np.nan
+    min: float = np.nan
+    q1: float = np.nan
+    median: float = np.nan
+    q3: float = np.nan
+    max: float = np.nan
+    skew: float = np.nan
+    kurt: float = np.nan
+    histogram: Histogram | None = None
+    box: BoxSummary | None = None
+    value_counts: pd.Series | None = None
+    empty_strings: int = 0
+
+    @property
+    def missing(self) -> int:
+        return self.rows - self.count
+
+    @property
+    def iqr_bounds(self) -> tuple[float, float]:
+        iqr = self.q3 - self.q1
+        return self.q1 - IQR_FACTOR * iqr, self.q3 + IQR_FACTOR * iqr
+
+    def describe(self) -> pd.Series:
+        """Same entries as ``Series.describe()``."""
+        if self.numeric:
+            values = [
+                self.count,
+                self.mean,
+                self.std,
+                self.min,
+                self.q1,
+                self.median,
+                self.q3,
+                self.max,
+            ]
+            index = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+            return pd.Series(values, index=index, name=self.name, dtype="float64")
+        top, freq = (np.nan, np.nan)
+        if self.value_counts is not None and len(self.value_counts):
+            top, freq = self.value_counts.index[0], self.value_counts.iloc[0]
+        return pd.Series(
+            [self.count, self.unique, top, freq],
+            index=["count", "unique", "top", "freq"],
+            name=self.name,
+            dtype=object,
+        )
+
+
+def _is_numeric(series: pd.Series) -> bool:
+    # describe() coi cột bool là cột phân loại
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(
+        series
+    )
+
+
+def numeric_columns(df: pd.DataFrame) -> list[str]:
+    """Columns profiled as numeric, from the dtypes alone (stable while a job runs)."""
+    return [col for col in df.columns if _is_numeric(df[col])]
+
+
+def _moments(values: np.ndarray) -> tuple[float, float, float, float]:
+    """mean, std (ddof=1), skew and kurtosis as computed by pandas."""
+    if not len(values):
+        return np.nan, np.nan, np.nan, np.nan
+    moments = Moments.of(values)
+    return (moments.mean, *moment_stats(moments.n, moments.m2, moments.m3, moments.m4))
+
+
+def profile_column(series: pd.Series) -> ColumnProfile:
+    rows = len(series)
+    if _is_numeric(series):
+        values = series.to_numpy(dtype="float64", na_value=np.nan)
+        present = values[~np.isnan(values)]
+        mean, std, skew, kurt = _moments(present)
+        profile = ColumnProfile(
+            series.name,
+            series.dtype,
+            rows,
+            len(present),
+            series.nunique(),
+            True,
+            mean=mean,
+            std=std,
+            skew=skew,
+            kurt=kurt,
+        )
+        if len(present):
+            profile.min, profile.max = float(present.min()), float(present.max())
+            profile.q1, profile.median, profile.q3 = (
+                float(q) for q in np.quantile(present, QUARTILES)
+            )
+            profile.histogram = Histogram.of(present)
+            profile.box = BoxSummary.of(
+                present, (profile.q1, profile.median, profile.q3)
+            )
+        return profile
+
+    value_counts = series.value_counts()
+    empty_strings = 0
+    if pd.api.types.is_object_dtype(series) or isinstance(
+        series.dtype, pd.CategoricalDtype
+    ):
+        empty_strings = int(value_counts.get("", 0))
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Bỏ các category không xuất hiện, như Series.value_counts của cột object
+        value_counts = value_counts[value_counts > 0]
+    return ColumnProfile(
+        series.name,
+        series.dtype,
+        rows,
+        int(series.count()),
+        len(value_counts),
+        False,
+        value_counts=value_counts,
+        empty_strings=empty_strings,
+    )
+
+
+def describe_frame(profiles: dict[str, ColumnProfile]) -> pd.DataFrame:
+    """Same table as ``df.describe(include="all").transpose()``."""
+    rows = {name: profile.describe() for name, profile in profiles.items()}
+    if not rows:
+        return pd.DataFrame()
+    order = ["count", "unique", "top", "freq", "mean", "std"]
+    order += ["min", "25%", "50%", "75%", "max"]
+    table = pd.DataFrame(rows).transpose()
+    return table[[column for column in order if column in table.columns]]
+
+
+class ProfileJob:
+    """
+    Profiles every column of ``df`` on a daemon thread. ``cancel()`` stops it
+    before the next column; a cancelled job counts as finished.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.total = len(df.columns)
+        self.done = 0
+        self.profiles: dict[str, ColumnProfile] = {}
+        self.error: Exception | None = None
+        self._cancelled = threading.Event()
+        self._finished = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(df,), daemon=True)
+        self._thread.start()
+
+    def _run(self, df: pd.DataFrame):
+        try:
+            for col in df.columns:
+                if self._cancelled.is_set():
+                    break
+                self.profiles[col] = profile_column(df[col])
+                self.done += 1
+        except Exception as e:
+            self.error = e
+        finally:
+            self._finished.set()
+
+    @property
+    def finished(self) -> bool:
+        return self._finished.is_set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def progress(self) -> float:
+        return self.done / self.total if self.total else 1.0
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._finished.wait(timeout)
+
+
+@dataclass
+class ProfileStore:
+    """
+    LRU of profile jobs keyed on (data version, filter state). Evicted jobs
+    are cancelled, so superseded work does not keep using the CPU.
+    """
+
+    max_entries: int = 8
+    _jobs: OrderedDict = field(default_factory=OrderedDict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def job(self, key, df: pd.DataFrame, replaces=None) -> ProfileJob:
+        """
+        The job for ``key``, started on ``df`` if there is none yet (or the
+        previous one failed or was cancelled). The job under ``replaces``, a
+        key the caller no longer needs, is cancelled if it is still running.
+        """
+        with self._lock:
+            if replaces is not None and replaces != key:
+                previous = self._jobs.pop(replaces, None)
+                if previous is not None and not previous.finished:
+                    previous.cancel()
+                elif previous is not None:
+                    # Đã xong: giữ lại để dùng lại khi quay về trạng thái lọc cũ
+                    self._jobs[replaces] = previous
+                    self._jobs.move_to_end(replaces, last=False)
+            job = self._jobs.get(key)
+            if job is None or job.error is not None or job.cancelled:
+                job = ProfileJob(df)
+                self._jobs[key] = job
+            self._jobs.move_to_end(key)
+            while len(self._jobs) > self.max_entries:
+                _, evicted = self._jobs.popitem(last=False)
+                evicted.cancel()
+            return job
+
+
+@st.cache_resource
+def get_profile_store() -> ProfileStore:
+    """Shared profile store for the whole Streamlit process."""
+    return ProfileStore()
+
+
+@st.fragment(run_every=POLL_SECONDS)
+def _watch(job: ProfileJob, text: str):
+    if job.finished:
+        # Chạy lại cả trang một lần để mọi phần dùng hồ sơ đầy đủ (job bị huỷ thì
+        # lần chạy lại sẽ tạo job mới)
+        st.rerun()
+    st.progress(job.progress, text=text)
+
+
+def ready_profiles(job: ProfileJob, text: str) -> dict[str, ColumnProfile]:
+    """
+    The profiles ``job`` has finished so far, without waiting. While it runs,
+    a progress bar polls it and reruns the page once when it finishes.
+    """
+    if job.error is not None:
+        raise job.error
+    if not job.finished:
+        _watch(job, text)
+    return dict(job.profiles)
@@ -0,0 +1,164 @@
+"""
+Province dimension table.
+
+Each of the 63 provinces has a stable integer id equal to its code in the
+shared ``Địa phương`` categorical (see ``utils.schema``), a canonical name, an
+accent-folded name used for matching, its GSO socio-economic region and the
+coordinates used by the dashboard maps. Name variants such as
+``TP. Hồ Chí Minh`` / ``Thành phố Hồ Chí Minh`` / ``Ðắk Lắk`` (with U+00D0)
+are resolved to the canonical name here and nowhere else.
+"""
+
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+DBSH = "Đồng bằng sông Hồng"
+TDMNPB = "Trung du và miền núi phía Bắc"
+BTB_DHMT = "Bắc Trung Bộ và duyên hải miền Trung"
+TN = "Tây Nguyên"
+DNB = "Đông Nam Bộ"
+DBSCL = "Đồng bằng sông Cửu Long"
+
+REGIONS: tuple[str, ...] = (DBSH, TDMNPB, BTB_DHMT, TN, DNB, DBSCL)
+
+# (tên chuẩn, vùng, vĩ độ, kinh độ) — thứ tự này là mã số nguyên của tỉnh
+_PROVINCE_ROWS = (
+    ("An Giang", DBSCL, 10.521, 105.125),
+    ("Bà Rịa - Vũng Tàu", DNB, 10.541, 107.242),
+    ("Bắc Giang", TDMNPB, 21.281, 106.197),
+    ("Bắc Kạn", TDMNPB, 22.145, 105.834),
+    ("Bạc Liêu", DBSCL, 9.2941, 105.727),
+    ("Bắc Ninh", DBSH, 21.186, 106.076),
+    ("Bến Tre", DBSCL, 10.243, 106.375),
+    ("Bình Định", BTB_DHMT, 14.166, 108.905),
+    ("Bình Dương", DNB, 11.125, 106.655),
+    ("Bình Phước", DNB, 11.750, 106.883),
+    ("Bình Thuận", BTB_DHMT, 11.100, 108.100),
+    ("Cà Mau", DBSCL, 9.1796, 105.150),
+    ("Cần Thơ", DBSCL, 10.045, 105.746),
+    ("Cao Bằng", TDMNPB, 22.665, 106.261),
+    ("Đà Nẵng", BTB_DHMT, 16.047, 108.206),
+    ("Đắk Lắk", TN, 12.710, 108.237),
+    ("Đắk Nông", TN, 12.001, 107.700),
+    ("Điện Biên", TDMNPB, 21.397, 103.023),
+    ("Đồng Nai", DNB, 10.960, 106.830),
+    ("Đồng Tháp", DBSCL, 10.472, 105.629),
+    ("Gia Lai", TN, 13.983, 108.000),
+    ("Hà Giang", TDMNPB, 22.825, 104.983),
+    ("Hà Nam", DBSH, 20.544, 105.922),
+    ("Hà Nội", DBSH, 21.0285, 105.8542),
+    ("Hà Tĩnh", BTB_DHMT, 18.355, 105.887),
+    ("Hải Dương", DBSH, 20.939, 106.330),
+    ("Hải Phòng", DBSH, 20.844, 106.688),
+    ("Hậu Giang", DBSCL, 9.7570, 105.641),
+    ("Hòa Bình", TDMNPB, 20.857, 105.337),
+    ("Hưng Yên", DBSH, 20.646, 106.051),
+    ("Khánh Hòa", BTB_DHMT, 12.253, 109.190),
+    ("Kiên Giang", DBSCL, 10.008, 105.080),
+    ("Kon Tum", TN, 14.349, 107.986),
+    ("Lai Châu", TDMNPB, 22.396, 103.459),
+    ("Lâm Đồng", TN, 11.935, 108.439),
+    ("Lạng Sơn", TDMNPB, 21.847, 106.761),
+    ("Lào Cai", TDMNPB, 22.485, 103.970),
+    ("Long An", DBSCL, 10.543, 106.413),
+    ("Nam Định", DBSH, 20.437, 106.162),
+    ("Nghệ An", BTB_DHMT, 19.234, 104.920),
+    ("Ninh Bình", DBSH, 20.250, 105.974),
+    ("Ninh Thuận", BTB_DHMT, 11.573, 108.988),
+    ("Phú Thọ", TDMNPB, 21.399, 105.232),
+    ("Phú Yên", BTB_DHMT, 13.088, 109.092),
+    ("Quảng Bình", BTB_DHMT, 17.489, 106.599),
+    ("Quảng Nam", BTB_DHMT, 15.539, 108.019),
+    ("Quảng Ngãi", BTB_DHMT, 15.120, 108.800),
+    ("Quảng Ninh", DBSH, 21.005, 107.292),
+    ("Quảng Trị", BTB_DHMT, 16.747, 107.188),
+    ("Sóc Trăng", DBSCL, 9.603, 105.979),
+    ("Sơn La", TDMNPB, 21.316, 103.914),
+    ("Tây Ninh", DNB, 11.365, 106.103),
+    ("Thái Bình", DBSH, 20.451, 106.336),
+    ("Thái Nguyên", TDMNPB, 21.593, 105.844),
+    ("Thanh Hóa", BTB_DHMT, 19.807, 105.776),
+    ("Thừa Thiên Huế", BTB_DHMT, 16.467, 107.595),
+    ("Tiền Giang", DBSCL, 10.361, 106.355),
+    ("Trà Vinh", DBSCL, 9.812, 106.299),
+    ("Tuyên Quang", TDMNPB, 21.823, 105.214),
+    ("Vĩnh Long", DBSCL, 10.253, 105.973),
+    ("Vĩnh Phúc", DBSH, 21.308, 105.604),
+    ("Yên Bái", TDMNPB, 21.704, 104.887),
+    ("TP.Hồ Chí Minh", DNB, 10.7626, 106.6602),
+)
+
+
+def fold(name: str) -> str:
+    """Accent- and punctuation-insensitive key: ``"TP. Hồ Chí Minh"`` -> ``"ho chi minh"``."""
+    text = unicodedata.normalize("NFD", str(name))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = text.translate(str.maketrans({"Đ": "d", "đ": "d", "Ð": "d"})).lower()
+    text = re.sub(r"[^a-z0-9]+", " ", text).strip()
+    return re.sub(r"^(thanh pho|tp|tinh)\s+", "", text)
+
+
+PROVINCES: tuple[str, ...] = tuple(row[0] for row in _PROVINCE_ROWS)
+
+DIMENSION = pd.DataFrame(
+    {
+        "province_id": np.arange(len(_PROVINCE_ROWS), dtype="int8"),
+        "name": PROVINCES,
+        "folded": [fold(name) for name in PROVINCES],
+        "region": pd.Categorical(
+            [row[1] for row in _PROVINCE_ROWS], categories=REGIONS
+        ),
+        "lat": np.array([row[2] for row in _PROVINCE_ROWS], dtype="float32"),
+        "lon": np.array([row[3] for row in _PROVINCE_ROWS], dtype="float32"),
+    }
+)
+
+_BY_FOLDED = dict(zip(DIMENSION["folded"], PROVINCES))
+_BY_FOLDED.update(
+    {
+        "hcm": "TP.Hồ Chí Minh",
+        "tphcm": "TP.Hồ Chí Minh",
+        "sai gon": "TP.Hồ Chí Minh",
+        "hue": "Thừa Thiên Huế",
+    }
+)
+
+
+def resolve(name) -> str | None:
+    """Canonical province name for ``name``, or None if it is not a known province."""
+    if name is None or (isinstance(name, float) and np.isnan(name)):
+        return None
+    return _BY_FOLDED.get(fold(name))
+
+
+def canonicalize(value):
+    """Maps a name (or list of names) to canonical names, leaving unknown values as-is."""
+    if isinstance(value, (list, tuple)):
+        return [canonicalize(item) for item in value]
+    if isinstance(value, str):
+        return resolve(value) or value
+    return value
+
+
+def province_ids(categories) -> np.ndarray:
+    """Integer province id for each category label (-1 if unknown)."""
+    ids = {name: i for i, name in enumerate(PROVINCES)}
+    return np.array([ids.get(name, -1) for name in categories], dtype="int16")
+
+
+def attach_coordinates(df: pd.DataFrame, column: str = "Địa phương") -> pd.DataFrame:
+    """
+    Adds ``Lat``/``Lon`` by integer lookup: categorical code -> province id ->
+    dimension row, with no string-keyed merge. Unknown provinces get NaN.
+    """
+    series = df[column]
+    ids = province_ids(series.cat.categories)
+    # Thêm một hàng NaN ở cuối cho mã -1 (giá trị thiếu hoặc tỉnh không xác định)
+    lat = np.append(DIMENSION["lat"].to_numpy(), np.float32(np.nan))
+    lon = np.append(DIMENSION["lon"].to_numpy(), np.float32(np.nan))
+    codes = series.cat.codes.to_numpy()
+    rows = np.where(codes < 0, -1, ids[codes])
+    return df.assign(Lat=lat[rows], Lon=lon[rows])
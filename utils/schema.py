@@ -0,0 +1,208 @@
+"""
+Compact dtypes for the bundled datasets.
+
+``Địa phương`` and ``Cấp học`` become categoricals backed by one shared
+category dictionary each, so codes are comparable across tables; province
+names are first resolved to their canonical form (``utils.provinces``).
+Years become int16. In the province tables every count becomes int32
+(float32 for counts published in thousands, e.g. ``Học sinh`` in ``MG.csv``).
+
+``infer_dtypes`` is the generic counterpart for uploaded files: text columns
+that hold numbers (also written with Vietnamese separators, ``1.234.567`` or
+``12,5``) become numeric, integers and floats are downcast, and repetitive
+text becomes categorical.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from utils.provinces import PROVINCES, resolve
+
+PROVINCE_COLUMN = "Địa phương"
+LEVEL_COLUMN = "Cấp học"
+YEAR_COLUMNS = ("Năm", "Năm học")
+
+LEVELS: tuple[str, ...] = (
+    "Tiểu học",
+    "Trung học cơ sở",
+    "Trung học phổ thông",
+    "Tổng số",
+)
+
+PROVINCE_DTYPE = pd.CategoricalDtype(PROVINCES)
+LEVEL_DTYPE = pd.CategoricalDtype(LEVELS)
+
+
+def _as_shared_category(
+    series: pd.Series, dtype: pd.CategoricalDtype, canonical=None
+) -> pd.Series:
+    """
+    Casts to ``dtype`` after mapping each distinct value through ``canonical``
+    (if given). Unknown values are appended to the categories instead of
+    becoming NaN.
+    """
+    values = series.astype("string").str.strip().astype(object)
+    if canonical is not None:
+        uniques = values.dropna().unique()
+        mapping = {value: canonical(value) or value for value in uniques}
+        values = values.map(mapping)
+    extra = pd.Index(values.dropna().unique()).difference(dtype.categories)
+    if len(extra):
+        dtype = pd.CategoricalDtype([*dtype.categories, *sorted(extra)])
+    return values.astype(dtype)
+
+
+def _narrow_int(series: pd.Series) -> pd.Series:
+    info = np.iinfo(np.int32)
+    if series.min() >= info.min and series.max() <= info.max:
+        return series.astype("int32")
+    return series
+
+
+def apply_schema(df: pd.DataFrame, compact_counts: bool = False) -> pd.DataFrame:
+    """Returns ``df`` with compact dtypes; ``compact_counts`` narrows every count column."""
+    df = df.copy()
+    for col in df.columns:
+        if col == PROVINCE_COLUMN:
+            df[col] = _as_shared_category(df[col], PROVINCE_DTYPE, resolve)
+        elif col == LEVEL_COLUMN:
+            df[col] = _as_shared_category(df[col], LEVEL_DTYPE)
+        elif col in YEAR_COLUMNS:
+            years = pd.to_numeric(df[col], errors="coerce")
+            df[col] = years.astype("Int16" if years.isna().any() else "int16")
+        elif compact_counts and pd.api.types.is_integer_dtype(df[col]):
+            df[col] = _narrow_int(df[col])
+        elif compact_counts and pd.api.types.is_float_dtype(df[col]):
+            df[col] = df[col].astype("float32")
+    return df
+
+
+def memory_footprint(df: pd.DataFrame) -> int:
+    """Bytes used by ``df``, including the contents of object columns."""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def memory_report(
+    before: dict[str, pd.DataFrame], after: dict[str, pd.DataFrame]
+) -> pd.DataFrame:
+    """Per-table memory footprint before/after applying the schema."""
+    rows = []
+    for key, df in after.items():
+        size_before = memory_footprint(before[key])
+        size_after = memory_footprint(df)
+        rows.append(
+            {
+                "Bảng": key,
+                "Trước (KB)": round(size_before / 1024, 1),
+                "Sau (KB)": round(size_after / 1024, 1),
+                "Giảm (%)": round((1 - size_after / size_before) * 100, 1),
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+# Chỉ đổi sang category khi số giá trị khác nhau không quá tỉ lệ này so với số dòng
+CATEGORY_RATIO = 0.5
+
+# Cách viết số: thông thường (1234.5), kiểu Việt Nam (1.234.567,5) và kiểu Anh (1,234,567.5)
+_PLAIN_NUMBER = re.compile(r"[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?")
+_VN_NUMBER = re.compile(r"[+-]?(\d{1,3}(\.\d{3})+|\d+)(,\d+)?")
+_EN_NUMBER = re.compile(r"[+-]?\d{1,3}(,\d{3})*(\.\d+)?")
+# Số nguyên có dấu chấm ngăn cách hàng nghìn (822.553, 1.155): không phải số thập phân
+_VN_THOUSANDS = re.compile(r"[+-]?[1-9]\d{0,2}(\.\d{3})+")
+
+
+def _parse_numbers(texts: pd.Series) -> pd.Series | None:
+    """
+    ``texts`` (stripped strings) as floats if every one of them is a number in
+    a single notation, else None. A column whose values all look like
+    ``822.553`` or ``1.155`` is read as Vietnamese thousands (GSO counts);
+    otherwise plain notation wins, then Vietnamese, then English.
+    """
+    if texts.str.fullmatch(_VN_THOUSANDS).all():
+        return pd.to_numeric(texts.str.replace(".", "", regex=False))
+    if texts.str.fullmatch(_PLAIN_NUMBER).all():
+        return pd.to_numeric(texts)
+    if texts.str.fullmatch(_VN_NUMBER).all():
+        texts = texts.str.replace(".", "", regex=False).str.replace(
+            ",", ".", regex=False
+        )
+        return pd.to_numeric(texts)
+    if texts.str.fullmatch(_EN_NUMBER).all():
+        return pd.to_numeric(texts.str.replace(",", "", regex=False))
+    return None
+
+
+def _numeric_from_text(series: pd.Series) -> pd.Series | None:
+    # Chỉ phân tích các giá trị khác nhau rồi trải lại theo mã
+    codes, uniques = pd.factorize(series)
+    if len(uniques) == 0:
+        return None
+    numbers = _parse_numbers(pd.Series(uniques).astype(str).str.strip())
+    if numbers is None:
+        return None
+    values = numbers.to_numpy(dtype="float64")[codes]
+    values[codes < 0] = np.nan
+    return pd.Series(values, index=series.index, name=series.name)
+
+
+def _downcast(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_bool_dtype(series):
+        return series
+    if pd.api.types.is_float_dtype(series):
+        values = series.to_numpy()
+        finite = values[~np.isnan(values)]
+        if len(finite) == len(values) and np.array_equal(finite, np.round(finite)):
+            # Số thực nhưng toàn giá trị nguyên, không thiếu: về số nguyên
+            return pd.to_numeric(series.astype("int64"), downcast="integer")
+        return pd.to_numeric(series, downcast="float")
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast="integer")
+    return series
+
+
+def _infer_column(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(series):
+        return _downcast(series)
+    if not pd.api.types.is_object_dtype(series):
+        return series
+    numbers = _numeric_from_text(series)
+    if numbers is not None:
+        return _downcast(numbers)
+    n_unique = series.nunique()
+    if len(series) and n_unique <= CATEGORY_RATIO * len(series):
+        return series.astype("category")
+    return series
+
+
+def infer_dtypes(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Returns ``df`` with inferred compact dtypes and a per-column report of
+    the dtype change and memory saved.
+    """
+    typed = df.copy(deep=False)
+    rows = []
+    for col in df.columns:
+        converted = _infer_column(df[col])
+        if converted is df[col]:
+            continue
+        before = int(df[col].memory_usage(deep=True, index=False))
+        after = int(converted.memory_usage(deep=True, index=False))
+        if after >= before:
+            continue
+        typed[col] = converted
+        rows.append(
+            {
+                "Cột": col,
+                "Kiểu gốc": str(df[col].dtype),
+                "Kiểu mới": str(converted.dtype),
+                "Trước (KB)": round(before / 1024, 1),
+                "Sau (KB)": round(after / 1024, 1),
+            }
+        )
+    report = pd.DataFrame(
+        rows, columns=["Cột", "Kiểu gốc", "Kiểu mới", "Trước (KB)", "Sau (KB)"]
+    )
+    return typed, report
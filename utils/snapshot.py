@@ -0,0 +1,150 @@
+"""
+Columnar snapshot of the bundled datasets.
+
+``python -m utils.snapshot`` converts every catalog CSV into an uncompressed
+Arrow IPC (Feather v2) file under ``data/.snapshot/`` together with a
+``manifest.json`` recording each source file's size, mtime and SHA-256. The
+registry reads a table from the snapshot (memory-mapped, already typed) and
+falls back to parsing the CSV only when the manifest says the snapshot is stale.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+SNAPSHOT_DIRNAME = ".snapshot"
+MANIFEST_NAME = "manifest.json"
+# Tăng khi định dạng hoặc schema của snapshot thay đổi
+FORMAT_VERSION = 3
+
+
+def snapshot_dir(data_dir: str) -> str:
+    return os.path.join(data_dir, SNAPSHOT_DIRNAME)
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_manifest(data_dir: str) -> dict:
+    """Returns the snapshot manifest, or an empty one if missing or unreadable."""
+    try:
+        with open(
+            os.path.join(snapshot_dir(data_dir), MANIFEST_NAME), encoding="utf-8"
+        ) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"tables": {}}
+    if manifest.get("format_version") != FORMAT_VERSION:
+        return {"tables": {}}
+    return manifest
+
+
+def is_fresh(entry: dict, source_path: str) -> bool:
+    """True if the snapshot entry was built from the current content of ``source_path``."""
+    stat = os.stat(source_path)
+    if entry.get("size") != stat.st_size:
+        return False
+    if entry.get("mtime_ns") == stat.st_mtime_ns:
+        return True
+    # mtime không đáng tin sau khi checkout/COPY, so sánh nội dung
+    return entry.get("sha256") == file_sha256(source_path)
+
+
+def read_table(data_dir: str, key: str, source_path: str) -> pd.DataFrame | None:
+    """Loads ``key`` from the snapshot, or returns None if it is absent or stale."""
+    entry = read_manifest(data_dir)["tables"].get(key)
+    if entry is None or entry.get("source") != os.path.relpath(source_path, data_dir):
+        return None
+    path = os.path.join(snapshot_dir(data_dir), entry["file"])
+    try:
+        if not is_fresh(entry, source_path):
+            return None
+        table = feather.read_table(path, memory_map=True)
+    except (OSError, pa.ArrowException):
+        return None
+    return table.to_pandas()
+
+
+def write_snapshot(data_dir: str, frames: dict[str, tuple[str, pd.DataFrame]]) -> dict:
+    """
+    Writes ``{key: (source_path, df)}`` as Arrow IPC files plus a manifest.
+    Returns the manifest.
+    """
+    out_dir = snapshot_dir(data_dir)
+    os.makedirs(out_dir, exist_ok=True)
+
+    tables = {}
+    for key, (source_path, df) in frames.items():
+        file_name = f"{key}.arrow"
+        tmp_path = os.path.join(out_dir, file_name + ".tmp")
+        # Không nén để có thể memory-map trực tiếp khi đọc
+        feather.write_feather(df, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, os.path.join(out_dir, file_name))
+
+        stat = os.stat(source_path)
+        tables[key] = {
+            "source": os.path.relpath(source_path, data_dir),
+            "file": file_name,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": file_sha256(source_path),
+            "rows": len(df),
+            "columns": {col: str(dtype) for col, dtype in df.dtypes.items()},
+        }
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "tables": tables,
+    }
+    tmp_manifest = os.path.join(out_dir, MANIFEST_NAME + ".tmp")
+    with open(tmp_manifest, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_manifest, os.path.join(out_dir, MANIFEST_NAME))
+    return manifest
+
+
+def build(data_dir: str | None = None) -> tuple[dict, pd.DataFrame]:
+    """
+    Parses every catalog CSV, applies the schema and rewrites the snapshot.
+    Returns the manifest and the before/after memory report.
+    """
+    from utils.datasets import CATALOG, DATA_DIR, read_dataset, read_raw
+    from utils.schema import memory_report
+
+    data_dir = data_dir or DATA_DIR
+    raw, frames = {}, {}
+    for spec in CATALOG:
+        source_path = os.path.join(data_dir, spec.path)
+        raw[spec.key] = read_raw(source_path)
+        typed = read_dataset(source_path, by_province=spec.by_province)
+        frames[spec.key] = (source_path, typed)
+    report = memory_report(raw, {key: df for key, (_, df) in frames.items()})
+    return write_snapshot(data_dir, frames), report
+
+
+def main(argv: list[str]) -> int:
+    data_dir = argv[0] if argv else None
+    start = time.perf_counter()
+    manifest, report = build(data_dir)
+    for key, entry in manifest["tables"].items():
+        print(f"{key:<14} {entry['rows']:>6} dòng  <- {entry['source']}")
+    print()
+    print(report.to_string(index=False))
+    print(f"\nĐã tạo snapshot trong {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,364 @@
+"""
+Out-of-core column statistics for CSV files too big to load as one frame.
+
+A CSV is read ``CHUNK_ROWS`` rows at a time and every column feeds a
+``ColumnStats`` accumulator: count and null count, min/max, mean and the
+second to fourth central moments (merged chunk by chunk with the parallel
+form of Welford's update, giving variance, skew and kurtosis), a mergeable
+quantile sketch and a HyperLogLog distinct count. Accumulators of different
+chunks or files merge, so memory stays bounded by one chunk plus the
+sketches regardless of the file size.
+
+``python -m utils.streaming FILE.csv [...]`` prints the same tables from the
+command line, for files that cannot be uploaded at all.
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 100_000
+# Kích thước mỗi tầng của sketch phân vị: sai số hạng cỡ log2(n / k) / k
+SKETCH_K = 2048
+# HyperLogLog với 2^14 thanh ghi: sai số chuẩn khoảng 1.04 / sqrt(2^14) ≈ 0.8%
+HLL_PRECISION = 14
+
+
+def moment_stats(n: int, m2: float, m3: float, m4: float) -> tuple[float, float, float]:
+    """
+    Sample std, skew and kurtosis from the sums of the 2nd-4th powers of the
+    deviations from the mean, with the same bias corrections as pandas.
+    """
+    std = np.sqrt(m2 / (n - 1)) if n > 1 else np.nan
+    skew = kurt = np.nan
+    if n >= 3:
+        skew = 0.0 if m2 == 0 else n * (n - 1) ** 0.5 / (n - 2) * m3 / m2**1.5
+    if n >= 4:
+        if m2 == 0:
+            kurt = 0.0
+        else:
+            numerator = n * (n + 1) * (n - 1) * m4
+            denominator = (n - 2) * (n - 3) * m2**2
+            kurt = numerator / denominator - 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+    return float(std), float(skew), float(kurt)
+
+
+class Moments:
+    """Count, mean and central moment sums, mergeable across chunks."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = self.m3 = self.m4 = 0.0
+
+    @classmethod
+    def of(cls, values: np.ndarray) -> "Moments":
+        moments = cls()
+        if len(values):
+            moments.n = len(values)
+            moments.mean = float(values.mean())
+            dev = values - moments.mean
+            dev2 = dev * dev
+            moments.m2 = float(dev2.sum())
+            moments.m3 = float((dev2 * dev).sum())
+            moments.m4 = float((dev2 * dev2).sum())
+        return moments
+
+    def merge(self, other: "Moments"):
+        """Pébay's pairwise update (Welford/Chan generalized to the 4th moment)."""
+        if other.n == 0:
+            return
+        if self.n == 0:
+            self.n, self.mean = other.n, other.mean
+            self.m2, self.m3, self.m4 = other.m2, other.m3, other.m4
+            return
+        na, nb = self.n, other.n
+        n = na + nb
+        delta = other.mean - self.mean
+        d_n = delta / n
+        d_n2 = d_n * d_n
+        term = delta * d_n * na * nb
+        self.m4 += (
+            other.m4
+            + term * d_n2 * (na * na - na * nb + nb * nb)
+            + 6 * d_n2 * (na * na * other.m2 + nb * nb * self.m2)
+            + 4 * d_n * (na * other.m3 - nb * self.m3)
+        )
+        self.m3 += (
+            other.m3 + term * d_n * (na - nb) + 3 * d_n * (na * other.m2 - nb * self.m2)
+        )
+        self.m2 += other.m2 + term
+        self.mean += nb * d_n
+        self.n = n
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch: compactor levels of at most ``k`` sorted items,
+    level ``h`` items standing for ``2**h`` values. A full level keeps every
+    other item (random offset) and promotes them to the next level.
+    """
+
+    def __init__(self, k: int = SKETCH_K, seed: int = 0):
+        self.k = k
+        self.levels: list[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values: np.ndarray):
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: "QuantileSketch"):
+        for h, items in enumerate(other.levels):
+            if h == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self._compress()
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            items = self.levels[h]
+            if len(items) > self.k:
+                items = np.sort(items)
+                # Giữ số phần tử chẵn để nén, phần lẻ còn lại ở tầng hiện tại
+                keep = items[len(items) - len(items) % 2 :]
+                promoted = items[self._rng.integers(2) : len(items) - len(keep) : 2]
+                self.levels[h] = keep
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            h += 1
+
+    def quantiles(self, qs) -> np.ndarray:
+        items = np.concatenate(self.levels)
+        if not len(items):
+            return np.full(len(qs), np.nan)
+        weights = np.concatenate(
+            [np.full(len(level), 2.0**h) for h, level in enumerate(self.levels)]
+        )
+        order = np.argsort(items, kind="stable")
+        items, cumulative = items[order], np.cumsum(weights[order])
+        # Cùng quy ước nội suy tuyến tính của np.quantile trên các hạng có trọng số
+        ranks = np.asarray(qs) * (cumulative[-1] - 1)
+        positions = cumulative - weights[order] / 2 - 0.5
+        return np.interp(ranks, positions, items)
+
+
+class HyperLogLog:
+    """Approximate distinct count over 64-bit hashes (``pd.util.hash_array``)."""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.p = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, values: np.ndarray):
+        if not len(values):
+            return
+        hashes = pd.util.hash_array(values)
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.intp)
+        rest = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        # Độ dài bit chính xác vì rest < 2^53; rho = số bit 0 đứng đầu + 1
+        _, bit_length = np.frexp(rest.astype(np.float64))
+        rho = (64 - self.p - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rho)
+
+    def merge(self, other: "HyperLogLog"):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(int)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Hiệu chỉnh cho số lượng nhỏ (linear counting)
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+
+class ColumnStats:
+    """Streaming statistics of one column."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows = 0
+        self.nulls = 0
+        # Cột là số nếu mọi khối đọc được đều là số
+        self.numeric = True
+        self.dtypes: set[str] = set()
+        self.min = np.inf
+        self.max = -np.inf
+        self.moments = Moments()
+        self.sketch = QuantileSketch()
+        self.distinct = HyperLogLog()
+
+    def update(self, series: pd.Series):
+        self.rows += len(series)
+        present = series.dropna()
+        self.nulls += len(series) - len(present)
+        self.dtypes.add(str(series.dtype))
+        is_number = pd.api.types.is_numeric_dtype(
+            series
+        ) and not pd.api.types.is_bool_dtype(series)
+        if not is_number:
+            self.numeric = False
+            self.distinct.update(present.to_numpy())
+            return
+        # Băm dạng float64 để 1 (khối kiểu int) và 1.0 (khối kiểu float) là một giá trị
+        values = present.to_numpy(dtype="float64")
+        self.distinct.update(values)
+        if self.numeric and len(values):
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+            self.moments.merge(Moments.of(values))
+            self.sketch.update(values)
+
+    def merge(self, other: "ColumnStats"):
+        self.rows += other.rows
+        self.nulls += other.nulls
+        self.dtypes |= other.dtypes
+        self.numeric = self.numeric and other.numeric
+        self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+        self.distinct.merge(other.distinct)
+
+    @property
+    def count(self) -> int:
+        return self.rows - self.nulls
+
+    @property
+    def dtype(self) -> str:
+        if len(self.dtypes) == 1:
+            return next(iter(self.dtypes))
+        return "float64" if self.numeric else "object"
+
+    def describe(self) -> pd.Series:
+        """Like ``Series.describe()``; quartiles and ``unique`` are approximate."""
+        if self.numeric:
+            std, _, _ = moment_stats(
+                self.moments.n, self.moments.m2, self.moments.m3, self.moments.m4
+            )
+            q1, median, q3 = self.sketch.quantiles([0.25, 0.5, 0.75])
+            has_values = self.count > 0
+            values = [
+                self.count,
+                self.moments.mean if has_values else np.nan,
+                std,
+                self.min if has_values else np.nan,
+                q1,
+                median,
+                q3,
+                self.max if has_values else np.nan,
+            ]
+            index = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+            return pd.Series(values, index=index, name=self.name, dtype="float64")
+        return pd.Series(
+            [self.count, self.distinct.count()],
+            index=["count", "unique"],
+            name=self.name,
+            dtype=object,
+        )
+
+    def shape_stats(self) -> tuple[float, float]:
+        """(skew, kurtosis) of a numeric column."""
+        _, skew, kurt = moment_stats(
+            self.moments.n, self.moments.m2, self.moments.m3, self.moments.m4
+        )
+        return skew, kurt
+
+
+def update_stats(stats: dict[str, ColumnStats], chunk: pd.DataFrame):
+    for col in chunk.columns:
+        if col not in stats:
+            stats[col] = ColumnStats(col)
+        stats[col].update(chunk[col])
+
+
+def merge_stats(
+    into: dict[str, ColumnStats], other: dict[str, ColumnStats]
+) -> dict[str, ColumnStats]:
+    """Merges per-column stats (e.g. of another file) by column name."""
+    for col, column_stats in other.items():
+        if col in into:
+            into[col].merge(column_stats)
+        else:
+            into[col] = column_stats
+    return into
+
+
+def stream_csv(source, chunksize: int = CHUNK_ROWS, progress=None):
+    """
+    Per-column ``ColumnStats`` of a CSV path or binary file object, read
+    ``chunksize`` rows at a time. ``progress(rows)`` is called after each chunk.
+    """
+    stats: dict[str, ColumnStats] = {}
+    rows = 0
+    with pd.read_csv(source, chunksize=chunksize, encoding="utf-8-sig") as reader:
+        for chunk in reader:
+            chunk.columns = chunk.columns.astype(str).str.strip()
+            update_stats(stats, chunk)
+            rows += len(chunk)
+            if progress is not None:
+                progress(rows)
+    return stats
+
+
+def column_info(stats: dict[str, ColumnStats]) -> pd.DataFrame:
+    """The Data Wrangling column table; distinct counts are HyperLogLog estimates."""
+    return pd.DataFrame(
+        {
+            "Tên cột": list(stats),
+            "Kiểu dữ liệu": [s.dtype for s in stats.values()],
+            "Số giá trị không null": [s.count for s in stats.values()],
+            "Số giá trị duy nhất (ước lượng)": [
+                s.distinct.count() for s in stats.values()
+            ],
+        }
+    )
+
+
+def describe_stats(stats: dict[str, ColumnStats]) -> pd.DataFrame:
+    """``describe(include="all").transpose()`` from streaming stats."""
+    rows = {col: s.describe() for col, s in stats.items()}
+    if not rows:
+        return pd.DataFrame()
+    table = pd.DataFrame(rows).transpose()
+    order = ["count", "unique", "mean", "std", "min", "25%", "50%", "75%", "max"]
+    return table[[column for column in order if column in table.columns]]
+
+
+def shape_table(stats: dict[str, ColumnStats]) -> pd.DataFrame:
+    numeric = {col: s.shape_stats() for col, s in stats.items() if s.numeric}
+    return pd.DataFrame(numeric, index=["Skewness", "Kurtosis"]).transpose()
+
+
+def main(argv: list[str]) -> int:
+    if not argv:
+        print("Cách dùng: python -m utils.streaming TỆP.csv [TỆP.csv ...]")
+        return 2
+    start = time.perf_counter()
+    stats: dict[str, ColumnStats] = {}
+    for path in argv:
+        merge_stats(
+            stats,
+            stream_csv(
+                path, progress=lambda rows: print(f"\r{path}: {rows} dòng", end="")
+            ),
+        )
+        print()
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(column_info(stats).to_string(index=False))
+        print()
+        print(describe_stats(stats).to_string())
+        print()
+        print(shape_table(stats).to_string())
+    print(f"\nĐã đọc trong {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,374 @@
+"""
+Per-session cache of parsed uploads for the Data Wrangling and EDA pages.
+
+An uploaded file is parsed once per content hash; later reruns (slider moves,
+button clicks, switching between the two pages) are served from memory. Each
+session keeps at most ``MAX_ENTRIES`` frames and ``MAX_SESSION_BYTES`` of
+parsed data, evicting the least recently used upload first. On top of that
+all sessions share one ``UploadBudget`` of ``PROCESS_MAX_BYTES``: past it the
+least recently used frames of any session are dropped (and parsed again if
+that session asks for them), so the total stays bounded however many users
+are connected.
+
+Several files uploaded together (e.g. one extract per level or year) are
+combined into one frame: headers are normalized (BOM and surrounding spaces
+stripped), every column is cast to one dtype common to all files, and the
+files are joined by a single ``pd.concat``. The combined frame is cached
+under the ordered content hashes of its inputs.
+
+Every cached frame has been through ``utils.schema.infer_dtypes`` (numbers
+stored as text become numeric, numbers are downcast, repetitive text becomes
+categorical); the per-column report is kept next to it. Combined uploads are
+built from the raw parses of their files and typed once as a whole, so the
+result never depends on which files were uploaded on their own before.
+
+CSV uploads too big to parse into one frame can instead be read in chunks
+into mergeable column statistics (``utils.streaming``) with ``stream_uploads``.
+"""
+
+import hashlib
+import io
+import itertools
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.schema import infer_dtypes, memory_footprint
+from utils.streaming import ColumnStats, merge_stats, stream_csv
+
+# Máy chủ có 1 GB RAM cho cả tiến trình: mọi phiên dùng chung PROCESS_MAX_BYTES cho
+# dữ liệu tải lên, mỗi phiên không quá MAX_SESSION_BYTES
+PROCESS_MAX_BYTES = 256 * 1024 * 1024
+MAX_SESSION_BYTES = 128 * 1024 * 1024
+MAX_ENTRIES = 4
+SESSION_KEY = "upload_cache"
+# Từ kích thước này (tổng các tệp CSV) trang mặc định dùng chế độ streaming
+STREAMING_MIN_BYTES = 100 * 1024 * 1024
+STREAM_SESSION_KEY = "upload_stream_stats"
+# Cột ghi tên tệp gốc của từng dòng khi ghép nhiều tệp
+SOURCE_COLUMN = "Tệp nguồn"
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def parse_upload(name: str, data: bytes) -> pd.DataFrame:
+    """Parses CSV or Excel bytes with pandas' default dtypes."""
+    if name.lower().endswith(".csv"):
+        return pd.read_csv(io.BytesIO(data))
+    return pd.read_excel(io.BytesIO(data))
+
+
+def normalize_header(name) -> str:
+    """Header without a UTF-8 BOM or surrounding whitespace."""
+    return str(name).replace("\ufeff", "").strip()
+
+
+def _common_dtype(dtypes: list, complete: bool):
+    """
+    One dtype for a column across files; ``complete`` is False when some
+    files lack the column (their rows get missing values).
+    """
+    first = dtypes[0]
+    holds_missing = not (
+        pd.api.types.is_integer_dtype(first) or pd.api.types.is_bool_dtype(first)
+    )
+    if all(dtype == first for dtype in dtypes) and (complete or holds_missing):
+        return first
+    numeric = all(
+        isinstance(dtype, np.dtype) and dtype.kind in "iuf" for dtype in dtypes
+    )
+    if numeric:
+        common = np.result_type(*dtypes)
+        # Số nguyên không chứa được giá trị thiếu của các tệp không có cột này
+        return common if complete or common.kind == "f" else np.dtype("float64")
+    return np.dtype(object)
+
+
+def combine_frames(frames: list[pd.DataFrame], names: list[str]) -> pd.DataFrame:
+    """
+    Stacks ``frames`` (one per file in ``names``) into one frame with the
+    union of their columns, in first-seen order, plus ``SOURCE_COLUMN``.
+    """
+    frames = [df.rename(columns=normalize_header) for df in frames]
+    aligned = []
+    for df in frames:
+        # Đưa mọi tệp về cùng kiểu trước, để một lần concat không phải đoán kiểu lại
+        casts = {}
+        for column in df.columns:
+            dtypes = [other[column].dtype for other in frames if column in other]
+            target = _common_dtype(dtypes, len(dtypes) == len(frames))
+            if df[column].dtype != target:
+                casts[column] = target
+        aligned.append(df.astype(casts) if casts else df)
+    # Các cột theo thứ tự xuất hiện đầu tiên; tệp thiếu cột nhận giá trị thiếu
+    combined = pd.concat(aligned, ignore_index=True, sort=False)
+    if len(set(names)) < len(names):
+        names = [f"{i + 1}. {name}" for i, name in enumerate(names)]
+    combined[SOURCE_COLUMN] = pd.Categorical.from_codes(
+        np.repeat(np.arange(len(names)), [len(df) for df in frames]), categories=names
+    )
+    return combined
+
+
+class UploadBudget:
+    """
+    Byte budget shared by the upload caches of all sessions: one LRU of
+    (cache, hash) entries; past ``max_bytes`` the oldest entries are dropped
+    from whichever cache holds them.
+    """
+
+    def __init__(self, max_bytes: int = PROCESS_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # (token của cache, hash) -> (weakref tới cache, số byte)
+        self._entries: OrderedDict[tuple[int, str], tuple[weakref.ref, int]] = (
+            OrderedDict()
+        )
+        self._bytes = 0
+
+    def add(self, cache: "UploadCache", digest: str, size: int):
+        with self._lock:
+            self._entries[(cache.token, digest)] = (weakref.ref(cache), size)
+            self._bytes += size
+            evicted = []
+            while self._bytes > self.max_bytes and self._entries:
+                (_, old), (ref, old_size) = self._entries.popitem(last=False)
+                self._bytes -= old_size
+                evicted.append((ref, old))
+        # Ngoài khoá của budget, để không giữ hai khoá cùng lúc
+        for ref, old in evicted:
+            owner = ref()
+            if owner is not None:
+                owner.drop(old)
+
+    def touch(self, cache: "UploadCache", digest: str):
+        with self._lock:
+            if (cache.token, digest) in self._entries:
+                self._entries.move_to_end((cache.token, digest))
+
+    def remove(self, token: int, digests):
+        with self._lock:
+            for digest in digests:
+                entry = self._entries.pop((token, digest), None)
+                if entry is not None:
+                    self._bytes -= entry[1]
+
+    def release(self, token: int):
+        """Forgets every entry of the cache ``token`` (its session has ended)."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == token]:
+                self._bytes -= self._entries.pop(key)[1]
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "bytes": self._bytes}
+
+
+@st.cache_resource
+def upload_budget() -> UploadBudget:
+    """The process-wide budget of ``session_cache`` caches."""
+    return UploadBudget()
+
+
+_tokens = itertools.count()
+
+
+class UploadCache:
+    """
+    LRU of parsed frames keyed on content hash, bounded in bytes and entries,
+    and by ``budget`` (shared with other sessions) if given.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = MAX_SESSION_BYTES,
+        max_entries: int = MAX_ENTRIES,
+        budget: UploadBudget | None = None,
+    ):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.budget = budget
+        self.token = next(_tokens)
+        # Budget có thể bỏ frame của phiên này từ luồng của phiên khác
+        self._lock = threading.Lock()
+        if budget is not None:
+            weakref.finalize(self, budget.release, self.token)
+        # hash -> (frame đã tối ưu kiểu, số byte, báo cáo tối ưu kiểu)
+        self._frames: OrderedDict[str, tuple[pd.DataFrame, int, pd.DataFrame]] = (
+            OrderedDict()
+        )
+        # file_id của Streamlit -> hash, để không băm lại tệp ở mỗi lần rerun
+        self._hashes: dict[str, str] = {}
+        self._bytes = 0
+
+    def key(self, uploaded_file) -> str:
+        digest = self._hashes.get(uploaded_file.file_id)
+        if digest is None:
+            digest = content_hash(uploaded_file.getvalue())
+            self._hashes[uploaded_file.file_id] = digest
+        return digest
+
+    def get(self, uploaded_file) -> pd.DataFrame:
+        """
+        Frame for ``uploaded_file``, parsing it only on a miss. The result is a
+        shallow copy: replacing columns is safe, editing values in place is not.
+        """
+        digest = self.key(uploaded_file)
+        entry = self._lookup(digest)
+        if entry is None:
+            df, report = infer_dtypes(
+                parse_upload(uploaded_file.name, uploaded_file.getvalue())
+            )
+            self._put(digest, df, report)
+        else:
+            df = entry[0]
+        return df.copy(deep=False)
+
+    def combined_key(self, uploaded_files) -> str:
+        if len(uploaded_files) == 1:
+            return self.key(uploaded_files[0])
+        digests = ":".join(self.key(f) for f in uploaded_files)
+        return content_hash(digests.encode())
+
+    def get_combined(self, uploaded_files) -> pd.DataFrame:
+        """Like ``get`` for several files uploaded together, combined into one frame."""
+        if len(uploaded_files) == 1:
+            return self.get(uploaded_files[0])
+        digest = self.combined_key(uploaded_files)
+        entry = self._lookup(digest)
+        if entry is None:
+            df, report = infer_dtypes(
+                combine_frames(
+                    # Luôn ghép bản đọc thô rồi suy kiểu một lần cho cả bảng, để kết quả
+                    # không phụ thuộc tệp nào đã từng được tải riêng (và đã có kiểu)
+                    [parse_upload(f.name, f.getvalue()) for f in uploaded_files],
+                    [f.name for f in uploaded_files],
+                )
+            )
+            self._put(digest, df, report)
+        else:
+            df = entry[0]
+        return df.copy(deep=False)
+
+    def typing_report(self, digest: str) -> pd.DataFrame | None:
+        """Dtype changes made when the upload ``digest`` was parsed, if still cached."""
+        entry = self._frames.get(digest)
+        return None if entry is None else entry[2]
+
+    def _lookup(self, digest: str):
+        with self._lock:
+            entry = self._frames.get(digest)
+            if entry is not None:
+                self._frames.move_to_end(digest)
+        if entry is not None and self.budget is not None:
+            self.budget.touch(self, digest)
+        return entry
+
+    def _put(self, digest: str, df: pd.DataFrame, report: pd.DataFrame):
+        size = memory_footprint(df)
+        if size > self.max_bytes or (
+            self.budget is not None and size > self.budget.max_bytes
+        ):
+            return
+        evicted = []
+        with self._lock:
+            self._frames[digest] = (df, size, report)
+            self._bytes += size
+            while self._bytes > self.max_bytes or len(self._frames) > self.max_entries:
+                old, (_, old_size, _) = self._frames.popitem(last=False)
+                self._bytes -= old_size
+                self._forget_hashes(old)
+                evicted.append(old)
+        if self.budget is not None:
+            self.budget.remove(self.token, evicted)
+            self.budget.add(self, digest, size)
+
+    def drop(self, digest: str):
+        """Removes ``digest`` from this cache (called by the shared budget)."""
+        with self._lock:
+            entry = self._frames.pop(digest, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+                self._forget_hashes(digest)
+
+    def _forget_hashes(self, digest: str):
+        self._hashes = {k: v for k, v in self._hashes.items() if v != digest}
+
+    def stats(self) -> dict:
+        return {"entries": len(self._frames), "bytes": self._bytes}
+
+
+def session_cache() -> UploadCache:
+    """The current session's upload cache (shared by all pages of the session)."""
+    if SESSION_KEY not in st.session_state:
+        st.session_state[SESSION_KEY] = UploadCache(budget=upload_budget())
+    return st.session_state[SESSION_KEY]
+
+
+def upload_key(uploaded_file) -> str:
+    """Content hash of a ``st.file_uploader`` result (memoized per file_id)."""
+    return session_cache().key(uploaded_file)
+
+
+def read_upload(uploaded_file) -> pd.DataFrame:
+    """Parsed frame for a ``st.file_uploader`` result, cached by content hash."""
+    return session_cache().get(uploaded_file)
+
+
+def uploads_key(uploaded_files) -> str:
+    """Cache key of several uploads combined (the content hash for a single file)."""
+    return session_cache().combined_key(uploaded_files)
+
+
+def read_uploads(uploaded_files) -> pd.DataFrame:
+    """Combined frame for a multi-file ``st.file_uploader`` result, cached by input hashes."""
+    return session_cache().get_combined(uploaded_files)
+
+
+def typing_report(uploaded_files) -> pd.DataFrame | None:
+    """Per-column dtype changes made on ingest for ``read_uploads(uploaded_files)``."""
+    cache = session_cache()
+    return cache.typing_report(cache.combined_key(uploaded_files))
+
+
+def can_stream(uploaded_files) -> bool:
+    return all(f.name.lower().endswith(".csv") for f in uploaded_files)
+
+
+def should_stream(uploaded_files) -> bool:
+    """True for CSV uploads too large to parse safely into one frame."""
+    total = sum(f.size for f in uploaded_files)
+    return can_stream(uploaded_files) and total >= STREAMING_MIN_BYTES
+
+
+def stream_uploads(uploaded_files) -> dict[str, ColumnStats]:
+    """
+    Column statistics of CSV uploads read in chunks and merged by column name,
+    with a progress bar; cached per session on the input content hashes.
+    """
+    key = uploads_key(uploaded_files)
+    cached = st.session_state.setdefault(STREAM_SESSION_KEY, OrderedDict())
+    if key not in cached:
+        total = sum(f.size for f in uploaded_files) or 1
+        bar = st.progress(0.0, text="⏳ Đang đọc dữ liệu theo khối...")
+        stats: dict[str, ColumnStats] = {}
+        done = 0
+        for f in uploaded_files:
+            f.seek(0)
+
+            def report(rows, f=f, done=done):
+                fraction = min((done + f.tell()) / total, 1.0)
+                bar.progress(fraction, text=f"⏳ {f.name}: đã đọc {rows:,} dòng")
+
+            merge_stats(stats, stream_csv(f, progress=report))
+            done += f.size
+        bar.empty()
+        cached[key] = stats
+        while len(cached) > MAX_ENTRIES:
+            cached.popitem(last=False)
+    return cached[key]